@@ -4,13 +4,14 @@ import os
 import re
 import sqlite3
 import json
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+import time
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from functions import *
-from predictor import PricePredictionModel
-import pandas as pd
+from model_registry import ModelRegistry
+from predictor import FEATURES
+from jobs import JobQueue
 import logging
-from datetime import datetime
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key'  # Replace with a strong, random secret key
@@ -34,27 +35,15 @@ def get_username(email):
     """Extracts the username from an email address."""
     return email.split('@')[0] if '@' in email else email
 
-# Create the `amazon_data` table if it doesn't exist
+# Create the product and price history tables if they don't exist
 def initialize_database():
     conn = get_price_history_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS amazon_data (
-            srno INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            link TEXT NOT NULL UNIQUE,
-            "2024-10-08" INTEGER DEFAULT 0,
-            "2024-10-09" INTEGER DEFAULT 0,
-            "2024-10-10" INTEGER DEFAULT 0,
-            "2024-10-11" INTEGER DEFAULT 0,
-            "2024-10-12" INTEGER DEFAULT 0,
-            "2024-10-13" INTEGER DEFAULT 0,
-            "2024-10-14" INTEGER DEFAULT 0,
-            "2024-10-15" INTEGER DEFAULT 0,
-            "2024-10-16" INTEGER DEFAULT 0
-        )
-    ''')
-    conn.commit()
+    init_price_store(conn)
+    migrate_wide_tables(conn)  # No-op once the per-day columns are gone
+    conn.close()
+
+    conn = get_users_db_connection()
+    init_watch_store(conn)
     conn.close()
 
 initialize_database()
@@ -63,117 +52,116 @@ initialize_database()
 # Initialize Logger
 logging.basicConfig(level=logging.INFO)
 
-# Load data and initialize model
-try:
-    # Connect to the database and load data
-    conn = sqlite3.connect(price_history_db_path)
-    query = "SELECT * FROM amazon_data"
-    dataset = pd.read_sql_query(query, conn)
-    conn.close()
-
-    # Initialize prediction model
-    predictor = PricePredictionModel(dataset)
-    predictor_dataset = predictor.preprocess_data()
-    predictor.train_model()  # Train the model with the cleaned dataset
-
-    logging.info("PricePredictionModel initialized successfully.")
-except Exception as e:
-    logging.error(f"Failed to initialize PricePredictionModel: {e}")
-    predictor = None
+# Models are trained offline (training.py); the registry loads the active
+# version on first prediction and follows manifest changes without a restart
+model_registry = ModelRegistry()
 
 
 @app.route('/')
 def index():
     return render_template('index.html', title="TrackIT")
 
+# Background workers for /scrape so Flask threads don't block on the browsers
+SCRAPE_WORKERS = 4
+scrape_jobs = JobQueue(workers=SCRAPE_WORKERS)
+
 @app.route('/scrape', methods=['POST'])
 def scrape():
-    amazon_product_url = request.form['url']
+    """Queue a comparison and send the user to its result page."""
+    job_id = scrape_jobs.submit(run_comparison, request.form['url'])
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'job_id': job_id, 'status_url': url_for('scrape_status', job_id=job_id)}), 202
+    return redirect(url_for('scrape_result', job_id=job_id))
+
+@app.route('/scrape/<job_id>', methods=['GET'])
+def scrape_result(job_id):
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return render_template('result.html', error="This comparison has expired. Please search again."), 404
+    if job['status'] == 'done':
+        return render_template('result.html', **job['result'])
+    if job['status'] == 'failed':
+        return render_template('result.html', error="Something went wrong while comparing prices. Please try again.")
+    return render_template('pending.html', job_id=job_id)
+
+@app.route('/scrape/<job_id>/status', methods=['GET'])
+def scrape_status(job_id):
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return jsonify({'id': job_id, 'status': 'unknown'}), 404
+    return jsonify({'id': job_id, 'status': job['status'], 'error': job['error']})
+
+def run_comparison(amazon_product_url):
+    """Scrape all platforms for an Amazon URL; returns the result.html context."""
+    amazon_started = time.monotonic()
     amazon_data = scrape_amazon_product(amazon_product_url)
+    amazon_latency = round(time.monotonic() - amazon_started, 2)
     product_name = amazon_data.get('name', 'N/A')
-    current_price = amazon_data['price']
     product_link = amazon_data['link']
-    today_date = datetime.now().strftime('%Y-%m-%d')
 
     prediction = "Prediction unavailable"
+    srno = None
 
     conn = get_price_history_db_connection()
     cursor = conn.cursor()
 
     try:
-        cursor.execute(f'ALTER TABLE amazon_data ADD COLUMN "{today_date}" INTEGER DEFAULT 0')
-        conn.commit()
-    except sqlite3.OperationalError:
-        # Column already exists
-        pass
-
-    prediction_text = "Prediction unavailable"
-
-    try:
-        cursor.execute('SELECT * FROM amazon_data WHERE name = ?', (product_name,))
+        cursor.execute('SELECT srno FROM amazon_data WHERE name = ? OR link = ?', (product_name, product_link))
         product = cursor.fetchone()
 
         if product:
-            # Update today's price for the product
-            cursor.execute(f'UPDATE amazon_data SET "{today_date}" = ? WHERE name = ?', (current_price, product_name))
+            srno = product['srno']
+        else:
+            # Insert new product data into the database
+            cursor.execute('INSERT INTO amazon_data (name, link) VALUES (?, ?)', (product_name, product_link))
+            srno = cursor.lastrowid
+
+        # Record today's price and details, unless the page came from the response cache
+        if not amazon_data.get('cached'):
+            record_products(conn, 'amazon', [(srno, amazon_data)])
             conn.commit()
 
-            # Extract price columns
-            product_prices = [product[col] for col in product.keys() if col.startswith("2024-")]
-
-            # Clean and filter numeric prices
-            def clean_price(price):
-                if isinstance(price, str):
-                    price = price.replace('₹', '').replace(',', '').strip()
-                try:
-                    return float(price)
-                except (ValueError, TypeError):
-                    return None
-
-            cleaned_prices = [clean_price(price) for price in product_prices if price is not None]
-
-            # Check if sufficient data is available for prediction
-            if len(cleaned_prices) >= 2 and predictor:
-                avg_price = sum(cleaned_prices) / len(cleaned_prices)
-                price_std = (sum((x - avg_price) ** 2 for x in cleaned_prices) / len(cleaned_prices)) ** 0.5
-                price_change = (max(cleaned_prices) - min(cleaned_prices)) / max(cleaned_prices)
-                input_features = [price_std, price_change]
-                try:
-                    prediction = predictor.predict(input_features)
-                except Exception as e:
-                    logging.error(f"Error during prediction: {e}")
-                    prediction = -1  # Default value
-            else:
-                logging.warning("Insufficient data for prediction.")
+        # Features are kept up to date by record_prices; only products with two or more prices have a row
+        features = load_price_features('amazon', [srno], conn)
+
+        # Check if sufficient data is available for prediction
+        if srno in features.index:
+            input_features = features.loc[srno, FEATURES].tolist()
+            try:
+                prediction, model_version = model_registry.predict(input_features, key=srno)
+                logging.info(f"Prediction {prediction} from model {model_version}")
+            except Exception as e:
+                logging.error(f"Error during prediction: {e}")
                 prediction = -1  # Default value
-
-            
         else:
-            # Insert new product data into the database
-            cursor.execute(f'''
-                INSERT INTO amazon_data (name, link, "{today_date}")
-                VALUES (?, ?, ?)
-            ''', (product_name, product_link, current_price))
-            conn.commit()
+            logging.warning("Insufficient data for prediction.")
+            prediction = -1  # Default value
 
     except Exception as e:
         logging.error(f"Error processing prediction: {e}")
 
 
-    # Fetch additional details
-    flipkart_product_url = find_flipkart_link(product_name)
-    flipkart_data = scrape_flipkart_product(flipkart_product_url) if flipkart_product_url else {}
-    reliance_product_data = get_first_product_details(product_name)
+    # Fetch additional details from the other platforms in parallel, reusing a stored match
+    match = get_product_match(conn, srno) if srno else None
+    comparison, latency = compare_across_platforms(product_name, match)
+    latency['amazon'] = amazon_latency
+
+    if srno:
+        try:
+            save_product_match(conn, srno, product_name, comparison)
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error saving product match: {e}")
 
     conn.close()
     prediction_value = int(prediction) if str(prediction).isdigit() else -1
-    return render_template(
-        'result.html',
-        amazon=amazon_data,
-        flipkart=flipkart_data,
-        reliance=reliance_product_data,
-        prediction=prediction_value
-        )
+    return {
+        'amazon': amazon_data,
+        'flipkart': comparison['flipkart'],
+        'reliance': comparison['reliance'],
+        'prediction': prediction_value,
+        'latency': latency,
+    }
         
 @app.route('/track', methods=['POST'])
 def track():
@@ -190,6 +178,13 @@ def track():
         srno_a = get_srno_from_link(amazon_link, 'amazon_data')
     if flipkart_link:
         srno_f = get_srno_from_link(flipkart_link, 'flipkart_data')
+    if srno_a and not srno_f:
+        # No Flipkart link was shown; fall back to a stored match the comparison would also trust
+        conn = get_price_history_db_connection()
+        match = get_product_match(conn, srno_a)
+        conn.close()
+        if match and match['flipkart_srno'] and (match['flipkart_confidence'] or 0) >= MATCH_MIN_CONFIDENCE:
+            srno_f = match['flipkart_srno']
 
     if not session.get('user_id'):
         # Store the intended action in session to redirect after login
@@ -341,35 +336,32 @@ def fromjson_filter(json_str):
 def fetch_watchlist_details(watchlist):
     """Fetch detailed information about the products in the user's watchlist."""
     watchlist_details = {'amazon': [], 'flipkart': []}
-    conn_price = get_users_db_connection()
-    cursor_price = conn_price.cursor()
 
     conn_data = get_price_history_db_connection()
     cursor_data = conn_data.cursor()
 
-    if watchlist['srno_a']:
-        try:
-            srnos_a = json.loads(watchlist['srno_a'])
-            for srno in srnos_a:
-                cursor_data.execute("SELECT * FROM amazon_data WHERE srno = ?", (srno,))
-                product = cursor_data.fetchone()
-                if product:
-                    watchlist_details['amazon'].append(product)
-        except Exception as e:
-            logging.error(f"Error parsing srno_a: {e}")
-
-    if watchlist['srno_f']:
+    for platform, column in (('amazon', 'srno_a'), ('flipkart', 'srno_f')):
+        if not watchlist[column]:
+            continue
         try:
-            srnos_f = json.loads(watchlist['srno_f'])
-            for srno in srnos_f:
-                cursor_data.execute("SELECT * FROM flipkart_data WHERE srno = ?", (srno,))
-                product = cursor_data.fetchone()
-                if product:
-                    watchlist_details['flipkart'].append(product)
+            srnos = json.loads(watchlist[column])
+            if srnos:
+                placeholders = ', '.join('?' for _ in srnos)
+                # Drop probabilities are precomputed in one batch by the nightly job
+                cursor_data.execute(
+                    f'''
+                    SELECT p.srno, p.name, p.link, COALESCE(p.image, 'N/A') AS image, r.drop_probability
+                    FROM {PLATFORM_TABLES[platform]} p
+                    LEFT JOIN price_prediction r ON r.platform = ? AND r.product_id = p.srno
+                    WHERE p.srno IN ({placeholders})
+                    ''',
+                    [platform] + srnos
+                )
+                watchlist_details[platform] = cursor_data.fetchall()
         except Exception as e:
-            logging.error(f"Error parsing srno_f: {e}")
+            logging.error(f"Error parsing {column}: {e}")
 
-    conn_price.close()
+    conn_data.close()
     return watchlist_details
 
 # Notification Route (Optional: Trigger manually)
@@ -379,35 +371,22 @@ def send_notifications():
     Manual route to trigger notifications.
     You can access this route to send notifications to all users.
     """
-    price_drops_amazon = notify("amazon_data")
-    price_drops_flipkart = notify("flipkart_data")
-
-    conn_users = get_users_db_connection()
-    cursor_users = conn_users.cursor()
-    cursor_users.execute("SELECT * FROM user")
-    user_carts = cursor_users.fetchall()
-    conn_users.close()
-
-    for cart in user_carts:
-        user_email = cart['user_mail']
-        # Check Flipkart notifications
-        if cart['srno_f']:
-            srnos_f = json.loads(cart['srno_f'])
-            for srno in price_drops_flipkart:
-                if srno in srnos_f:
-                    send_mail(user_email)
-                    break
-        # Check Amazon notifications
-        if cart['srno_a']:
-            srnos_a = json.loads(cart['srno_a'])
-            for srno in price_drops_amazon:
-                if srno in srnos_a:
-                    send_mail(user_email)
-                    break
+    send_alert_mail()
 
     flash('Notifications have been sent successfully.', 'success')
     return redirect(url_for('dashboard'))
 
+@app.route('/models', methods=['GET'])
+def model_metrics():
+    """Per-version model roles, traffic share, training score and live latency as JSON."""
+    return jsonify(model_registry.metrics())
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Scraper health counters as JSON."""
+    return jsonify({'scrape_paths': path_stats(), 'cache': response_cache.stats(), 'page_timings': page_timings.stats(),
+                    'selectors': selector_registry.stats(), 'breakers': breaker_stats()})
+
 # Route to remove item from watchlist
 @app.route('/remove_watchlist', methods=['POST'])
 def remove_watchlist():
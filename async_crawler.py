@@ -0,0 +1,71 @@
+# async_crawler.py
+
+import asyncio
+import logging
+import random
+from urllib.parse import urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from http_fetch import HEADERS, HTML_PARSER, PARSERS
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncCrawler:
+    """
+    Fetches many product pages concurrently on one event loop, with a
+    semaphore per domain, one shared connection pool, per-request timeouts
+    and retries with jittered exponential backoff.
+    """
+
+    def __init__(self, per_domain=8, max_connections=200, timeout=15, retries=3, backoff=0.5):
+        self.per_domain = per_domain
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self._domains = {}
+
+    def _semaphore(self, url):
+        domain = urlparse(url).netloc.lower()
+        if domain not in self._domains:
+            self._domains[domain] = asyncio.Semaphore(self.per_domain)
+        return self._domains[domain]
+
+    async def fetch(self, session, url):
+        """Return the page body, or None once retries are exhausted."""
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore(url):
+                    async with session.get(url) as response:
+                        if response.status == 200:
+                            return await response.text()
+                        if response.status not in RETRY_STATUSES:
+                            logging.info(f"Async fetch of {url} returned {response.status}")
+                            return None
+                        logging.warning(f"Async fetch of {url} returned {response.status} (attempt {attempt + 1})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"Async fetch of {url} failed (attempt {attempt + 1}): {e}")
+
+            if attempt < self.retries:
+                # Full jitter keeps retries from hitting the host in lockstep
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        return None
+
+    async def crawl(self, urls, parse):
+        """Fetch every url and run parse(soup, url) on it; returns {url: result or None}."""
+        connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(headers=HEADERS, timeout=self.timeout, connector=connector) as session:
+            async def one(url):
+                html = await self.fetch(session, url)
+                return url, parse(BeautifulSoup(html, HTML_PARSER), url) if html else None
+
+            return dict(await asyncio.gather(*(one(url) for url in urls)))
+
+
+def crawl_products(platform, urls, **options):
+    """Blocking entry point: crawl product pages with the platform's HTTP parser."""
+    crawler = AsyncCrawler(**options)
+    return asyncio.run(crawler.crawl(list(urls), PARSERS[platform]))
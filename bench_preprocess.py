@@ -0,0 +1,109 @@
+# bench_preprocess.py
+#
+# Times PricePredictionModel.preprocess_data against the previous per-cell
+# implementation on a synthetic wide price table:
+#
+#   python bench_preprocess.py --products 50000 --days 400
+#
+# Prices are written as scraped text ('₹1,299') unless --numeric is given.
+# The legacy path only reads 2024- columns, so the features are compared on
+# a 2024-only copy of the table; the full run also shows how many date
+# columns each version actually used.
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from predictor import PricePredictionModel, date_columns
+
+
+def legacy_preprocess(dataset):
+    """The previous implementation: a Python call per cell and a row-wise apply."""
+    price_columns = [col for col in dataset.columns if col.startswith("2024-")]
+
+    def clean_price(price):
+        if isinstance(price, str):
+            price = price.replace('₹', '').replace(',', '').strip()
+        try:
+            return float(price) if float(price) > 0 else None
+        except ValueError:
+            return None
+
+    dataset[price_columns] = dataset[price_columns].map(clean_price)
+    dataset.dropna(subset=price_columns, thresh=2, inplace=True)
+    dataset['avg_price'] = dataset[price_columns].mean(axis=1)
+    dataset['price_std'] = dataset[price_columns].std(axis=1)
+    dataset['price_change'] = dataset[price_columns].apply(
+        lambda row: (row.max() - row.min()) / row.max() if row.max() else 0, axis=1
+    )
+    dataset['price_drop_prob'] = np.where(dataset['price_change'] > 0.05, dataset['price_change'] * 100, 0)
+    dataset.dropna(subset=['price_std', 'price_change'], inplace=True)
+    return dataset
+
+
+def make_table(products, days, start='2024-01-01', numeric=False, missing=0.2, seed=42):
+    """srno, name, link and one column per day, with a share of missing days."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(200, 100000, size=(products, 1))
+    steps = rng.choice([0.9, 0.95, 1.0, 1.0, 1.0, 1.05], size=(products, days))
+    prices = np.round(base * np.cumprod(steps, axis=1))
+    prices[rng.random((products, days)) < missing] = np.nan
+
+    columns = [day.strftime('%Y-%m-%d') for day in pd.date_range(start, periods=days)]
+    prices = pd.DataFrame(prices, columns=columns)
+    if not numeric:
+        prices = prices.apply(lambda col: col.map(lambda p: f"₹{p:,.0f}" if p == p else 'N/A'))
+    table = pd.DataFrame({
+        'srno': np.arange(1, products + 1),
+        'name': [f"Product {i}" for i in range(products)],
+        'link': [f"https://example.com/p/{i}" for i in range(products)],
+    })
+    return pd.concat([table, prices], axis=1)
+
+
+def timed(function, dataset):
+    started = time.perf_counter()
+    result = function(dataset.copy())
+    return result, time.perf_counter() - started
+
+
+def vectorized_preprocess(dataset):
+    return PricePredictionModel(dataset).preprocess_data()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark price preprocessing.")
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=400)
+    parser.add_argument('--numeric', action='store_true', help="store prices as numbers instead of scraped text")
+    parser.add_argument('--skip-legacy', action='store_true', help="only time the vectorized path")
+    args = parser.parse_args(argv)
+
+    table = make_table(args.products, args.days, numeric=args.numeric)
+    columns = date_columns(table)
+    print(f"{args.products} products x {len(columns)} days "
+          f"({sum(col.startswith('2024-') for col in columns)} in 2024), "
+          f"{'numeric' if args.numeric else 'text'} prices")
+
+    new, new_seconds = timed(vectorized_preprocess, table)
+    print(f"vectorized: {new_seconds:8.2f}s  {len(new)} rows, {len(columns)} date columns used")
+    if args.skip_legacy:
+        return
+
+    old, old_seconds = timed(legacy_preprocess, table)
+    used = sum(col.startswith('2024-') for col in columns)
+    print(f"legacy:     {old_seconds:8.2f}s  {len(old)} rows, {used} date columns used")
+    print(f"speedup:    {old_seconds / new_seconds:8.1f}x")
+
+    # Same features on the columns both versions read
+    only_2024 = table[[col for col in table.columns if col not in columns or col.startswith('2024-')]]
+    new_2024, _ = timed(vectorized_preprocess, only_2024)
+    for feature in ('avg_price', 'price_std', 'price_change', 'price_drop_prob'):
+        difference = np.abs(new_2024[feature].to_numpy() - old[feature].to_numpy()).max()
+        print(f"max |{feature} difference| on 2024 columns: {difference:.3g}")
+
+
+if __name__ == '__main__':
+    main()
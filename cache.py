@@ -0,0 +1,121 @@
+# cache.py
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Query parameters that only track the visit and never change the page
+TRACKING_PARAMS = re.compile(r'^(utm_.*|ref|ref_|tag|psc|smid|pf_rd_.*|pd_rd_.*|content-id|qid|sr|sprefix|crid|marketplace|store|srno|fm|iid|ppt|ppn|ssid|otracker.*)$')
+AMAZON_ASIN = re.compile(r'/(?:dp|gp/product)/([A-Z0-9]{10})')
+
+
+def normalize_url(url):
+    """Canonical cache key for a product URL."""
+    parts = urlparse(url.strip())
+    host = parts.netloc.lower()
+    if 'amazon.' in host:
+        match = AMAZON_ASIN.search(parts.path)
+        if match:
+            return f"https://{host}/dp/{match.group(1)}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k))
+    return urlunparse((parts.scheme.lower() or 'https', host, parts.path.rstrip('/'), '', urlencode(query), ''))
+
+
+def normalize_query(query):
+    """Canonical cache key for a search query."""
+    return ' '.join(query.lower().split())
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and a size cap. With `path`,
+    entries are also kept in a SQLite file so they survive restarts and are
+    shared between processes.
+    """
+
+    def __init__(self, ttl=3600, max_entries=1000, path=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)")
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT expires_at, value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]))
+                    self._entries[key] = entry
+
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if entry[0] < now:
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                self._delete(key)
+                return None
+
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (ttl or self.ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, now)
+                )
+                self._db.execute('''
+                    DELETE FROM cache WHERE expires_at < ? OR key IN (
+                        SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (now, self.max_entries))
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'size': len(self._entries),
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+            }
+
+    def _delete(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._db.commit()
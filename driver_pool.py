@@ -0,0 +1,98 @@
+# driver_pool.py
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import JavascriptException, WebDriverException
+
+
+class DriverPool:
+    """Bounded pool of warm headless Chrome drivers shared by the scrapers."""
+
+    def __init__(self, factory, size=3, max_uses=50, acquire_timeout=300):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver for one scrape and hand it back afterwards."""
+        driver = self.acquire()
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self.release(driver, healthy=healthy)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise RuntimeError("Timed out waiting for a free browser in the driver pool.")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            driver = self.factory()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._uses[id(driver)] = 0
+        logging.info(f"Driver pool started a new browser ({len(self._uses)}/{self.size} alive).")
+        return driver
+
+    def release(self, driver, healthy=True):
+        try:
+            with self._lock:
+                uses = self._uses.get(id(driver), 0) + 1
+                self._uses[id(driver)] = uses
+
+            if self._closed or not healthy or uses >= self.max_uses or not self._reset(driver):
+                self._discard(driver)
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle browser. Called automatically at interpreter exit."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def _reset(self, driver):
+        """Clear cookies and storage so the next scrape starts from a clean session."""
+        try:
+            driver.delete_all_cookies()
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except JavascriptException:
+                pass  # Storage is not accessible on pages like about:blank
+            driver.get("about:blank")
+            return True
+        except WebDriverException as err:
+            logging.warning(f"Driver failed to reset, recycling it: {err}")
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as err:
+            logging.warning(f"Error while quitting a pooled driver: {err}")
@@ -0,0 +1,105 @@
+# failures.py
+
+import glob
+import logging
+import os
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of scraping while a platform's breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Trips after `threshold` consecutive failures and rejects calls until a
+    backoff delay has passed. Then one probe call is let through: success
+    closes the breaker, failure reopens it with the delay doubled (up to
+    `max_delay`).
+    """
+
+    def __init__(self, name, threshold=5, base_delay=30, max_delay=30 * 60):
+        self.name = name
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._failures = 0
+        self._trips = 0
+        self._open_until = None  # None while closed
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._open_until is None:
+                return True
+            if self._probing or time.monotonic() < self._open_until:
+                return False
+            self._probing = True  # Half-open: a single trial call
+            return True
+
+    def record(self, success):
+        with self._lock:
+            was_probe, self._probing = self._probing, False
+            if success:
+                if self._open_until is not None:
+                    logging.info(f"Circuit for {self.name} closed again.")
+                self._failures = 0
+                self._trips = 0
+                self._open_until = None
+                return
+
+            self._failures += 1
+            if self._open_until is not None and not was_probe:
+                return  # A call that started before the breaker tripped
+            if was_probe or self._failures >= self.threshold:
+                delay = min(self.base_delay * 2 ** self._trips, self.max_delay)
+                self._trips += 1
+                self._open_until = time.monotonic() + delay
+                logging.warning(f"Circuit for {self.name} open for {delay}s after {self._failures} consecutive failures.")
+
+    def stats(self):
+        with self._lock:
+            remaining = max(0.0, self._open_until - time.monotonic()) if self._open_until else 0.0
+            return {
+                'state': 'closed' if self._open_until is None else ('half_open' if self._probing else 'open'),
+                'consecutive_failures': self._failures,
+                'trips': self._trips,
+                'retry_in': round(remaining, 1),
+            }
+
+
+class ScreenshotSampler:
+    """
+    Saves at most one error screenshot per platform every `interval` seconds
+    and keeps only the newest `keep` files per platform.
+    """
+
+    def __init__(self, directory, interval=600, keep=10):
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def capture(self, driver, platform):
+        now = time.time()
+        with self._lock:
+            if now - self._last.get(platform, 0) < self.interval:
+                return None
+            self._last[platform] = now
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{platform}_error_{int(now)}.png")
+        try:
+            driver.save_screenshot(path)
+        except Exception as e:
+            logging.warning(f"Could not save error screenshot: {e}")
+            return None
+        logging.info(f"Screenshot saved to {path}")
+
+        old = sorted(glob.glob(os.path.join(self.directory, f"{platform}_error_*.png")))[:-self.keep]
+        for stale in old:
+            os.remove(stale)
+        return path
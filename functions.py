@@ -5,15 +5,13 @@ import logging
 import os
 import json
 import re
-from datetime import date , datetime , timedelta
+from datetime import datetime , timedelta
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from bs4 import BeautifulSoup
 import time
 import pandas as pd
@@ -21,14 +19,47 @@ import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-import smtplib
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from urllib.parse import urlparse
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from driver_pool import DriverPool
+from mailer import Mailer
+from http_fetch import fetch_product, record_path, path_stats, get_session, HTTP_TIMEOUT, parse_reliance_product, product_record, star_rating
+from selector_registry import registry as selector_registry, is_xpath
+from failures import CircuitBreaker, CircuitOpenError, ScreenshotSampler
+from async_crawler import crawl_products
+from cache import TTLCache, normalize_url, normalize_query
+from title_index import TitleIndex, IndexCache
+from readiness import lighten_options, block_resources, wait_for_any, dismiss_if_present, PageTimings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, filename='scraper.log',
                     format='%(asctime)s:%(levelname)s:%(message)s')
 
+# Browser pool settings
+DRIVER_POOL_SIZE = 3      # Max headless browsers alive at once
+DRIVER_MAX_USES = 50      # Recycle a browser after this many pages
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def get_chromedriver_path():
+    """Resolve the chromedriver binary once per process."""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+            logging.info(f"Resolved chromedriver at {_chromedriver_path}")
+    return _chromedriver_path
+
+# Response cache for product pages and search lookups; set TRACKIT_CACHE_PATH to keep it on disk
+PAGE_CACHE_TTL = 60 * 60          # Scraped product pages, seconds
+SEARCH_CACHE_TTL = 24 * 60 * 60   # Search query -> product link, seconds
+response_cache = TTLCache(ttl=PAGE_CACHE_TTL, max_entries=5000, path=os.environ.get('TRACKIT_CACHE_PATH'))
+
 # Scraper functions
 def create_driver():
     chrome_options = Options()
@@ -36,82 +67,168 @@ def create_driver():
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--window-size=1920,1080")
+    lighten_options(chrome_options)  # No images/CSS/fonts, get() returns at DOMContentLoaded
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(get_chromedriver_path())
     driver = webdriver.Chrome(service=service, options=chrome_options)
+    block_resources(driver)
     return driver
 
-def scrape_amazon_product(url):
-    driver = create_driver()
-    product_details = {}
+# Warm browsers shared by every scraper; use `with driver_pool.driver() as driver:`
+driver_pool = DriverPool(create_driver, size=DRIVER_POOL_SIZE, max_uses=DRIVER_MAX_USES)
+atexit.register(driver_pool.close)
 
-    try:
-        logging.info(f"Navigating to Amazon URL: {url}")
-        driver.get(url)
-        
-        wait = WebDriverWait(driver, 5)
-        name_tag = wait.until(EC.presence_of_element_located((By.ID, 'productTitle')))
-        product_details['name'] = name_tag.text.strip()
-        logging.info(f"Product Name: {product_details['name']}")
+# Browser page times per platform, exposed on /stats
+page_timings = PageTimings()
 
-        try:
-            price_tag = driver.find_element(By.CSS_SELECTOR, 'span.a-price.aok-align-center.reinventPricePriceToPayMargin.priceToPay')
-            product_details['price'] = price_tag.text.strip()
-            logging.info(f"Price: {product_details['price']}")
-        except:
-            try:
-                price_tag = driver.find_element(By.ID, 'priceblock_dealprice')
-                product_details['price'] = price_tag.text.strip()
-                logging.info(f"Price: {product_details['price']}")
-            except:
-                product_details['price'] = 'N/A'
-                logging.warning("Price element not found.")
+# Browser failure handling: a platform that keeps failing is paused with
+# exponential backoff, and only a sample of error screenshots is kept
+BREAKER_THRESHOLD = 5        # Consecutive failed pages before pausing a platform
+BREAKER_BASE_DELAY = 30      # Seconds of the first pause; doubles on every re-trip
+BREAKER_MAX_DELAY = 30 * 60
+SCREENSHOT_DIR = os.path.join(os.getcwd(), "error_screenshots")
+error_screenshots = ScreenshotSampler(SCREENSHOT_DIR, interval=600, keep=10)
 
-        try:
-            image_tag = driver.find_element(By.ID, 'landingImage')
-            product_details['image'] = image_tag.get_attribute('src')
-            logging.info(f"Image URL: {product_details['image']}")
-        except:
-            product_details['image'] = 'N/A'
-            logging.warning("Image element not found.")
-
-        try:
-            rating_tag = driver.find_element(By.XPATH, '//a[@class="a-popover-trigger a-declarative"]/span[@class="a-size-base a-color-base"]')
-            star_rating = rating_tag.text.strip()  # Extracting the star rating
-            product_details['star_rating'] = star_rating + " out of 5 stars"
-            logging.info(f"Star Rating: {product_details['star_rating']}")
-        except:
-            product_details['star_rating'] = 'N/A'
-            logging.warning("Star rating element not found.")
-
-        # Extracting the total number of reviews
-        try:
-            reviews_tag = driver.find_element(By.ID, 'acrCustomerReviewText')
-            product_details['reviews'] = reviews_tag.text.strip()
-            logging.info(f"Reviews: {product_details['reviews']}")
-        except:
-            product_details['reviews'] = 'N/A'
-            logging.warning("Reviews element not found.")
+_breakers = {}
+_breakers_lock = threading.Lock()
 
-        product_details['link'] = url
+def scrape_breaker(platform):
+    with _breakers_lock:
+        if platform not in _breakers:
+            _breakers[platform] = CircuitBreaker(platform, BREAKER_THRESHOLD, BREAKER_BASE_DELAY, BREAKER_MAX_DELAY)
+        return _breakers[platform]
 
-    except Exception as err:
-        logging.error(f"An error occurred while scraping Amazon: {err}")
-    finally:
-        driver.quit()
+def breaker_stats():
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {platform: breaker.stats() for platform, breaker in breakers.items()}
 
-    return product_details
+def _guarded_scrape(platform, scraper, url):
+    """
+    Run a browser scraper behind the platform's circuit breaker. An empty
+    result or an exception counts as a failure; raises CircuitOpenError
+    without loading the page while the platform is paused.
+    """
+    breaker = scrape_breaker(platform)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{platform} scraping is paused after repeated failures")
+    try:
+        details = scraper(url)
+    except Exception:
+        breaker.record(False)
+        raise
+    breaker.record(bool(details))
+    return details
+
+# Browser scrapers
+#
+# Selectors come from the registry in selectors.json (see selector_registry).
+# All alternatives for a field are polled together until one renders, then
+# read in ranked order; only the selectors actually read are recorded.
+
+NAME_WAIT = 5   # Seconds for the product title to render
+PRICE_WAIT = 2  # Extra seconds a price may render after the title
+RESULT_WAIT = 10  # Seconds for the first search result to render
+BROWSER_FIELDS = ('image', 'star_rating', 'reviews', 'availability')
+
+def _locators(platform, field):
+    return [(By.XPATH if is_xpath(selector) else By.CSS_SELECTOR, selector)
+            for selector in selector_registry.selectors(platform, field)]
+
+def _element_value(driver, locator, attr=None):
+    """Stripped text (or `attr`) of the first element matching locator; '' if none."""
+    try:
+        elements = driver.find_elements(*locator)
+        if not elements:
+            return ''
+        return ((elements[0].get_attribute(attr) if attr else elements[0].text) or '').strip()
+    except WebDriverException:
+        return ''  # Element went stale while being read
+
+def _browser_field(driver, platform, field, timeout=0, attr=None):
+    """
+    Text (or `attr`) of the best-ranked registry selector with a non-empty
+    match, after waiting up to `timeout` seconds for any of them to render;
+    'N/A' when none has a value.
+    """
+    locators = _locators(platform, field)
+    if timeout:
+        try:
+            wait_for_any(driver, locators, timeout)
+        except TimeoutException:
+            pass  # Nothing rendered; the reads below record the misses
+
+    for locator in locators:
+        value = _element_value(driver, locator, attr)
+        selector_registry.record(platform, field, locator[1], bool(value))
+        if value:
+            logging.info(f"{platform} {field}: {value}")
+            return value
+
+    logging.warning(f"{platform} {field} element not found.")
+    return 'N/A'
+
+def _scrape_product_selenium(platform, url):
+    """Full product record from one browser page load; {} if the page has no title."""
+    with driver_pool.driver() as driver:
+        try:
+            logging.info(f"Navigating to {platform} URL: {url}")
+            driver.get(url)
+
+            name = _browser_field(driver, platform, 'name', NAME_WAIT)
+            if name == 'N/A':
+                error_screenshots.capture(driver, platform)
+                return {}
+
+            # Close an overlay only if it is already showing
+            for locator in _locators(platform, 'login_close'):
+                if dismiss_if_present(driver, locator):
+                    logging.info("Login pop-up closed.")
+                    break
+
+            details = {
+                'name': name,
+                'price': _browser_field(driver, platform, 'price', PRICE_WAIT),
+                'link': url,
+            }
+            for field in BROWSER_FIELDS:
+                details[field] = _browser_field(driver, platform, field, attr='src' if field == 'image' else None)
+            details['star_rating'] = star_rating(details['star_rating'])
+            if platform == 'flipkart' and details['availability'] == 'N/A':
+                details['availability'] = 'In stock'  # Flipkart only shows a banner when unavailable
+            return product_record(**details)
+
+        except Exception as err:
+            logging.error(f"An error occurred while scraping {platform}: {err}")
+            error_screenshots.capture(driver, platform)
+            return {}
+
+@page_timings.timed('amazon')
+def _scrape_amazon_product_selenium(url):
+    return _scrape_product_selenium('amazon', url)
+
+@page_timings.timed('flipkart')
+def _scrape_flipkart_product_selenium(url):
+    return _scrape_product_selenium('flipkart', url)
 
 def find_flipkart_link(product_name):
     words = product_name.split()[:5]
+    key = f"search:flipkart:{normalize_query(' '.join(words))}"
+    cached = response_cache.get(key)
+    if cached:
+        return cached
+
+    product_link = _search_flipkart(words)
+    if product_link:
+        response_cache.set(key, product_link, ttl=SEARCH_CACHE_TTL)
+    return product_link
+
+def _search_flipkart(words):
     query = '+'.join(words)
     url = f'https://www.flipkart.com/search?q={query}'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
-        'Accept-Language': 'en-US,en;q=0.5',
-    }
 
-    response = requests.get(url, headers=headers)
+    # Reuse the pooled keep-alive session of the HTTP fast path
+    response = get_session().get(url, timeout=HTTP_TIMEOUT)
 
     if response.status_code == 200:
         logging.info("Flipkart search request successful!")
@@ -132,114 +249,352 @@ def find_flipkart_link(product_name):
         logging.error(f"Failed to retrieve the Flipkart search page. Status code: {response.status_code}")
         return None
 
-def scrape_flipkart_product(url):
-    driver = create_driver()
-    product_details = {}
-
-    try:
-        logging.info(f"Navigating to Flipkart URL: {url}")
-        driver.get(url)
-        wait = WebDriverWait(driver, 2)
+def reliance_search_url(query):
+    # Format the search query for Reliance Digital
+    words = query.split()[:7]
+    limited_query = '%20'.join(words)
+    limited_query = re.sub(r'[(){}[\]]', '', limited_query)
+    return f"https://www.reliancedigital.in/search?q={limited_query}:relevance"
 
+@page_timings.timed('reliance')
+def _get_first_product_details_selenium(url):
+    with driver_pool.driver() as driver:
         try:
-            close_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'✕')]")))
-            close_button.click()
-            logging.info("Login pop-up closed.")
-        except:
-            logging.info("No login pop-up detected.")
+            logging.info(f"Visiting Reliance Digital URL: {url}")
+            driver.get(url)
+
+            # The first result card renders as a unit; its name and price arrive together
+            name = _browser_field(driver, 'reliance', 'name', RESULT_WAIT)
+            if name == 'N/A':
+                # No result card: a layout change or an empty search counts as a failure for the breaker
+                error_screenshots.capture(driver, 'reliance')
+                return {}
+            return product_record(
+                name=name,
+                price=_browser_field(driver, 'reliance', 'price', PRICE_WAIT),
+                link=_browser_field(driver, 'reliance', 'link', attr='href'),
+            )
+        except Exception as e:
+            logging.error("Error occurred while scraping Reliance Digital: " + str(e))
+            error_screenshots.capture(driver, 'reliance')
+            return {}
 
-        name_tag = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'span.VU-ZEz')))
-        product_details['name'] = name_tag.text.strip()
-        logging.info(f"Product Name: {product_details['name']}")
+# HTTP-first scrapers
+#
+# Each page is first fetched with a pooled requests session and parsed with
+# BeautifulSoup; Selenium is only used when that fast path can't find the price.
 
-        try:
-            price_tag = driver.find_element(By.CSS_SELECTOR, 'div.Nx9bqj.CxhGGd')
-            product_details['price'] = price_tag.text.strip()
-            logging.info(f"Price: {product_details['price']}")
-        except:
-            product_details['price'] = 'N/A'
-            logging.warning("Price element not found.")
+def _fast_path(platform, url):
+    details = fetch_product(platform, url)
+    record_path(platform, 'http' if details else 'selenium')
+    return details
 
+def _page_key(platform, url):
+    return f"page:{platform}:{normalize_url(url)}"
+
+def _cached_page(platform, key, url, fallback):
+    """
+    Serve a scraped page from the response cache, scraping it on a miss.
+    Cache hits carry cached=True so their price is not recorded again.
+    """
+    details = response_cache.get(key)
+    if details is not None:
+        return {**details, 'cached': True}
+    details = _fast_path(platform, url)
+    if not details:
         try:
-            image_tag = driver.find_element(By.CSS_SELECTOR, 'img._396cs4')
-            product_details['image'] = image_tag.get_attribute('src')
-            logging.info(f"Image URL: {product_details['image']}")
-        except:
-            product_details['image'] = 'N/A'
-            logging.warning("Image element not found.")
-
-        product_details['link'] = url
-            
-    except Exception as err:
-        logging.error(f"An error occurred while scraping Flipkart: {err}")
-    finally:
-        driver.quit()
+            details = _guarded_scrape(platform, fallback, url)
+        except CircuitOpenError as e:
+            logging.warning(f"Skipping browser scrape of {url}: {e}")
+            return {}
+    if details.get('name') and details.get('price') not in (None, 'N/A'):
+        response_cache.set(key, details, ttl=PAGE_CACHE_TTL)
+    return details
+
+def scrape_amazon_product(url):
+    return _cached_page('amazon', _page_key('amazon', url), url, _scrape_amazon_product_selenium)
 
-    return product_details
+def scrape_flipkart_product(url):
+    return _cached_page('flipkart', _page_key('flipkart', url), url, _scrape_flipkart_product_selenium)
 
 def get_first_product_details(query):
-    driver = create_driver()
-    product_details = {}
+    key = f"search:reliance:{normalize_query(query)}"
+    return _cached_page('reliance', key, reliance_search_url(query), _get_first_product_details_selenium)
 
-    try:
-        # Format the search query for Reliance Digital
-        words = query.split()[:7]
-        limited_query = '%20'.join(words)
-        limited_query = re.sub(r'[(){}[\]]', '', limited_query)
-        url = f"https://www.reliancedigital.in/search?q={limited_query}:relevance"
-        logging.info(f"Visiting Reliance Digital URL: {url}")
-        driver.get(url)
-        time.sleep(5)  # Wait for the page to load
-
-        wait = WebDriverWait(driver, 10)  # Increased wait time
-
-        # Wait for the product elements to be present
+@page_timings.timed('reliance')
+def _scrape_reliance_product_selenium(url):
+    with driver_pool.driver() as driver:
         try:
-            # Adjust selector for the product title
-            title_element = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "p.sp__name"))  # Selector for product name
-            )
-            product_details['name'] = title_element.text.strip()
-            logging.info(f"Product Title: {product_details['name']}")
+            logging.info(f"Navigating to Reliance Digital URL: {url}")
+            driver.get(url)
+            wait_for_any(driver, [(By.CSS_SELECTOR, 'script[type="application/ld+json"]'),
+                                  (By.CSS_SELECTOR, 'meta[property="product:price:amount"]')], 10)
+            return parse_reliance_product(BeautifulSoup(driver.page_source, 'html.parser'), url) or {}
         except Exception as e:
-            product_details['name'] = 'N/A'
-            logging.warning("Product title element not found.")
+            logging.error(f"An error occurred while scraping Reliance Digital: {e}")
+            return {}
+
+def scrape_reliance_product(url):
+    return _cached_page('reliance_product', _page_key('reliance', url), url, _scrape_reliance_product_selenium)
+
+# Cross-platform comparison
+#
+# Once the Amazon product name is known the other platforms are independent,
+# so they are looked up concurrently, each with its own deadline.
+
+COMPARISON_TIMEOUTS = {'flipkart': 25, 'reliance': 30}   # Seconds per platform
+
+_comparison_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="compare")
+
+def _lookup_flipkart(product_name, match=None):
+    if match and match['flipkart_link'] and match['flipkart_confidence'] >= MATCH_MIN_CONFIDENCE:
+        return scrape_flipkart_product(match['flipkart_link'])
+    candidate = match_title('flipkart', product_name)
+    if candidate:
+        logging.info(f"Local title match for {product_name!r}: {candidate['name']!r} ({candidate['score']})")
+        return scrape_flipkart_product(candidate['link'])
+    flipkart_product_url = find_flipkart_link(product_name)
+    return scrape_flipkart_product(flipkart_product_url) if flipkart_product_url else {}
+
+def _lookup_reliance(product_name, match=None):
+    if match and match['reliance_url'] and match['reliance_confidence'] >= MATCH_MIN_CONFIDENCE:
+        return scrape_reliance_product(match['reliance_url'])
+    return get_first_product_details(product_name)
+
+COMPARISON_LOOKUPS = {
+    'flipkart': _lookup_flipkart,
+    'reliance': _lookup_reliance,
+}
+
+def _timed(fn, *args):
+    started = time.monotonic()
+    result = fn(*args)
+    return result, time.monotonic() - started
+
+def compare_across_platforms(product_name, match=None, timeouts=None):
+    """
+    Runs the per-platform lookups concurrently and returns (results, latency).
+    With a stored product match the known product pages are scraped directly
+    instead of searching. A platform that errors or misses its deadline gets
+    {} and a latency of None; the others are returned as soon as they finish.
+    """
+    timeouts = {**COMPARISON_TIMEOUTS, **(timeouts or {})}
+    started = time.monotonic()
+    futures = {
+        platform: _comparison_executor.submit(_timed, lookup, product_name, match)
+        for platform, lookup in COMPARISON_LOOKUPS.items()
+    }
 
-        # Extract price
-        try:
-            # Updated selector for price
-            price_element = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.StyledPriceBoxM__PriceWrapper-sc-1l9ms6f-0 span:nth-of-type(2)"))  # Select the second span containing the price
-            )
-            product_details['price'] = price_element.text.strip()
-            logging.info(f"Price: {product_details['price']}")
-        except Exception as e:
-            product_details['price'] = 'N/A'
-            logging.warning("Price element not found.")
-        
+    results = {}
+    latency = {}
+    for platform, future in futures.items():
+        remaining = started + timeouts[platform] - time.monotonic()
         try:
-            # Selector for product link
-            link_element = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.sp a[href*='/']"))  # Adjusted to find the link in the correct div
-            )
-            product_details['link'] = f"{link_element.get_attribute('href').strip()}"  # Complete the URL
-            logging.info(f"Product Link: {product_details['link']}")
+            results[platform], seconds = future.result(timeout=max(0, remaining))
+            latency[platform] = round(seconds, 2)
+        except FuturesTimeout:
+            # The lookup keeps running in the background and frees its browser when done
+            logging.warning(f"{platform} lookup for '{product_name}' timed out after {timeouts[platform]}s")
+            results[platform], latency[platform] = {}, None
         except Exception as e:
-            product_details['link'] = 'N/A'
-            logging.warning("Product link element not found.")
+            logging.error(f"{platform} lookup for '{product_name}' failed: {e}")
+            results[platform], latency[platform] = {}, None
 
-    except Exception as e:
-        logging.error("Error occurred while scraping Reliance Digital: " + str(e))
+    logging.info(f"Comparison latency for '{product_name}': {latency}")
+    return results, latency
+
+# Cross-platform product matches
+#
+# The Flipkart product and Reliance Digital page for an Amazon product are
+# found once by search and stored in product_match, so later comparisons and
+# the nightly refresh go straight to the known pages.
+
+MATCH_MIN_CONFIDENCE = 0.3   # Below this a stored match is searched for again
+
+TITLE_MATCH_THRESHOLD = 0.5  # Local index candidates below this fall back to a live search
 
+def title_similarity(a, b):
+    """Token overlap between two product titles with the brand/model checks of TitleIndex, 0..1."""
+    results = TitleIndex([(None, b)]).lookup(a)
+    return results[0][2] if results else 0.0
+
+def _title_index_version(conn, platform):
+    return tuple(conn.execute(f"SELECT COUNT(*), MAX(srno) FROM {PLATFORM_TABLES[platform]}").fetchone())
+
+def _load_title_rows(platform):
+    conn = get_price_history_db_connection()
+    try:
+        rows = conn.execute(f"SELECT srno, link, name FROM {PLATFORM_TABLES[platform]}").fetchall()
+        return _title_index_version(conn, platform), [((row['srno'], row['link']), row['name']) for row in rows]
     finally:
-        driver.quit()
+        conn.close()
+
+_title_indexes = IndexCache(_load_title_rows)
 
-    return product_details
+def match_title(platform, title, threshold=TITLE_MATCH_THRESHOLD):
+    """
+    Best known product on `platform` for a title, from the local index only.
+    Returns {'srno', 'link', 'name', 'score'} or None when nothing clears the
+    threshold. The index is rebuilt whenever products are added.
+    """
+    conn = get_price_history_db_connection()
+    try:
+        version = _title_index_version(conn, platform)
+    finally:
+        conn.close()
+
+    results = _title_indexes.get(platform, version).lookup(title)
+    if not results or results[0][2] < threshold:
+        return None
+    (srno, link), name, score = results[0]
+    return {'srno': srno, 'link': link, 'name': name, 'score': score}
+
+def add_product(conn, platform, name, link):
+    """Insert a product if its link is new; returns its srno."""
+    table = PLATFORM_TABLES[platform]
+    conn.execute(f"INSERT OR IGNORE INTO {table} (name, link) VALUES (?, ?)", (name, link))
+    return conn.execute(f"SELECT srno FROM {table} WHERE link = ?", (link,)).fetchone()[0]
+
+def get_product_match(conn, amazon_srno):
+    return conn.execute('''
+        SELECT m.*, f.link AS flipkart_link, f.name AS flipkart_name
+        FROM product_match m LEFT JOIN flipkart_data f ON f.srno = m.flipkart_srno
+        WHERE m.amazon_srno = ?
+    ''', (amazon_srno,)).fetchone()
+
+def save_product_match(conn, amazon_srno, amazon_name, comparison):
+    """
+    Store what compare_across_platforms found for an Amazon product. Platforms
+    that came back empty keep their previous match. The caller commits.
+    """
+    now = datetime.now().isoformat(timespec='seconds')
+    flipkart = comparison.get('flipkart') or {}
+    reliance = comparison.get('reliance') or {}
+
+    flipkart_srno = flipkart_confidence = None
+    if flipkart.get('name') and flipkart.get('link'):
+        flipkart_srno = add_product(conn, 'flipkart', flipkart['name'], flipkart['link'])
+        if not flipkart.get('cached'):
+            record_products(conn, 'flipkart', [(flipkart_srno, flipkart)])
+        flipkart_confidence = title_similarity(amazon_name, flipkart['name'])
+
+    reliance_url = reliance_name = reliance_price = reliance_confidence = None
+    if reliance.get('name') not in (None, 'N/A') and reliance.get('link') not in (None, 'N/A'):
+        reliance_url, reliance_name = reliance['link'], reliance['name']
+        reliance_price = normalize_price(reliance.get('price'))[0]
+        reliance_confidence = title_similarity(amazon_name, reliance_name)
+
+    conn.execute('''
+        INSERT INTO product_match (amazon_srno, flipkart_srno, flipkart_confidence, reliance_url, reliance_name,
+                                   reliance_price_paise, reliance_confidence, matched_at, checked_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (amazon_srno) DO UPDATE SET
+            flipkart_srno = COALESCE(excluded.flipkart_srno, flipkart_srno),
+            flipkart_confidence = COALESCE(excluded.flipkart_confidence, flipkart_confidence),
+            reliance_url = COALESCE(excluded.reliance_url, reliance_url),
+            reliance_name = COALESCE(excluded.reliance_name, reliance_name),
+            reliance_price_paise = COALESCE(excluded.reliance_price_paise, reliance_price_paise),
+            reliance_confidence = COALESCE(excluded.reliance_confidence, reliance_confidence),
+            checked_at = excluded.checked_at
+    ''', (amazon_srno, flipkart_srno, flipkart_confidence, reliance_url, reliance_name,
+          reliance_price, reliance_confidence, now, now))
+
+def refresh_reliance_matches(workers=None):
+    """Re-scrape every matched Reliance Digital page; no search queries."""
+    conn = get_price_history_db_connection()
+    try:
+        rows = conn.execute("SELECT amazon_srno, reliance_url FROM product_match WHERE reliance_url IS NOT NULL").fetchall()
+        updates = []
+        with ThreadPoolExecutor(max_workers=workers or REFRESH_WORKERS) as executor:
+            futures = {executor.submit(_scrape_limited, scrape_reliance_product, row['reliance_url']): row for row in rows}
+            for future in as_completed(futures):
+                try:
+                    details = future.result()
+                except Exception as e:
+                    logging.error(f"Refresh of {futures[future]['reliance_url']} failed: {e}")
+                    continue
+                price_paise = normalize_price(details.get('price'))[0]
+                if price_paise is not None:
+                    updates.append((price_paise, datetime.now().isoformat(timespec='seconds'), futures[future]['amazon_srno']))
+
+        conn.executemany(
+            "UPDATE product_match SET reliance_price_paise = ?, checked_at = ? WHERE amazon_srno = ?", updates
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    logging.info(f"Refreshed {len(updates)} of {len(rows)} matched Reliance Digital prices.")
+    return {'table': 'product_match', 'pages': len(updates), 'failed': len(rows) - len(updates)}
 
 # Watchlist management functions
+#
+# The srno_a / srno_f JSON columns on the user table are mirrored into a
+# watch(user_id, platform, product_id) table indexed by product, so alert
+# fan-out is a single join from dropped products to their watchers.
+
+WATCH_COLUMNS = {'srno_a': 'amazon', 'srno_f': 'flipkart'}
+
+def init_watch_store(conn):
+    """Create the watch table and backfill it from the JSON columns once."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS watch (
+            user_id INTEGER NOT NULL,
+            platform TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, platform, product_id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_watch_product ON watch (platform, product_id)")
+
+    has_users = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user' COLLATE NOCASE").fetchone()
+    if has_users and conn.execute("SELECT 1 FROM watch LIMIT 1").fetchone() is None:
+        rows = []
+        for user_id, srno_a, srno_f in conn.execute("SELECT id, srno_a, srno_f FROM user").fetchall():
+            for platform, cell in (('amazon', srno_a), ('flipkart', srno_f)):
+                try:
+                    srnos = json.loads(cell) if cell else []
+                except json.JSONDecodeError:
+                    srnos = []
+                rows += [(user_id, platform, int(srno)) for srno in srnos]
+        conn.executemany("INSERT OR IGNORE INTO watch (user_id, platform, product_id) VALUES (?, ?, ?)", rows)
+        logging.info(f"Backfilled {len(rows)} watch rows from user watchlists.")
+    conn.commit()
+
+def _sync_watch(cursor, email, columnname, srno, watching):
+    platform = WATCH_COLUMNS[columnname.lower()]
+    if watching:
+        cursor.execute(
+            "INSERT OR IGNORE INTO watch (user_id, platform, product_id) SELECT id, ?, ? FROM user WHERE email = ?",
+            (platform, srno, email)
+        )
+    else:
+        cursor.execute(
+            "DELETE FROM watch WHERE platform = ? AND product_id = ? AND user_id IN (SELECT id FROM user WHERE email = ?)",
+            (platform, srno, email)
+        )
 
-import sqlite3
-import json
+def watchers_for_drops(platform, drops):
+    """
+    Maps each watcher's email to the drops (from notify) of the products they
+    watch, using the watch table's product index.
+    """
+    drops_by_srno = {drop['srno']: drop for drop in drops}
+    watchers = {}
+    conn = get_users_db_connection()
+    try:
+        for chunk in _chunks(drops_by_srno):
+            placeholders = ', '.join('?' for _ in chunk)
+            rows = conn.execute(f'''
+                SELECT u.email, w.product_id FROM watch w
+                JOIN user u ON u.id = w.user_id
+                WHERE w.platform = ? AND w.product_id IN ({placeholders})
+            ''', [platform] + chunk).fetchall()
+            for email, product_id in rows:
+                watchers.setdefault(email, []).append(drops_by_srno[product_id])
+    finally:
+        conn.close()
+    return watchers
 
 def remove_item(email, columnname, srno):
     conn = sqlite3.connect('users.db')  # Ensure correct database path
@@ -263,12 +618,14 @@ def remove_item(email, columnname, srno):
                     f"UPDATE User SET {columnname} = ? WHERE email = ?", 
                     (json.dumps(data_list), email)
                 )
-                conn.commit()
                 print(f"Item {srno} removed successfully from {columnname}.")
             else:
                 print(f"Item {srno} not found in the list.")
         else:
             print("No data found for the given email or column.")
+
+        _sync_watch(cursor, email, columnname, srno, watching=False)
+        conn.commit()
     
     except sqlite3.Error as e:
         print(f"Database Error: {e}")
@@ -299,10 +656,12 @@ def add_item(email, columnname, srno):
                 f"UPDATE user SET {columnname} = ? WHERE email = ?", 
                 (json.dumps(data_list), email)
             )
-            conn.commit()
             print(f"Item {srno} added successfully.")
         else:
             print(f"Item {srno} is already in the list.")
+
+        _sync_watch(cursor, email, columnname, srno, watching=True)
+        conn.commit()
     
     except sqlite3.Error as e:
         print(f"Error: {e}")
@@ -313,83 +672,207 @@ def add_item(email, columnname, srno):
 def does_user_have(usermail, columnname, srno):
     conn = get_users_db_connection()
     cursor = conn.cursor()
-    cursor.execute(f"SELECT {columnname} FROM user WHERE email = ?", (usermail,))
+    cursor.execute('''
+        SELECT 1 FROM watch w JOIN user u ON u.id = w.user_id
+        WHERE u.email = ? AND w.platform = ? AND w.product_id = ?
+    ''', (usermail, WATCH_COLUMNS[columnname.lower()], srno))
     data = cursor.fetchone()
     conn.close()
 
-    if data[columnname] is None:
-        return False
-
-    data_list = json.loads(data[columnname])
-
-    return True
+    return data is not None
 
 # Notification functions
 
-def notify(tablename):
+# Default price-drop thresholds
+DROP_MIN_PAISE = 100      # Ignore drops smaller than ₹1
+DROP_MIN_PCT = 0.0        # Minimum drop as a percentage of the previous price
+
+def detect_price_drops(platform, min_drop_paise=DROP_MIN_PAISE, min_drop_pct=DROP_MIN_PCT,
+                       all_time_low=False, conn=None):
     """
-    Checks for price drops in the specified table.
-    Returns a list of srnos with price drops.
+    Compares every product's latest price with its previous one in a single
+    vectorized pass over the price matrix. With all_time_low, only drops to a
+    new lowest price are reported. Returns one dict per dropped product.
     """
-    conn = get_price_history_db_connection()
-    cursor = conn.cursor()
-    try:
-        # Fetch all products
-        cursor.execute(f"SELECT srno, name FROM {tablename}")
-        products = cursor.fetchall()
-
-        price_drops = []
-
-        for product in products:
-            srno = product['srno']
-            name = product['name']
-
-            # Fetch price history (assuming you have columns like date_1, date_2, ..., date_n)
-            cursor.execute(f"PRAGMA table_info({tablename})")
-            columns_info = cursor.fetchall()
-            price_columns = [col['name'] for col in columns_info if col['name'].startswith('date_')]
-
-            cursor.execute(f"SELECT {', '.join(price_columns)} FROM {tablename} WHERE srno = ?", (srno,))
-            price_row = cursor.fetchone()
-
-            # Extract and clean prices
-            prices = [row for row in price_row if row is not None and row != 'N/A']
-            cleaned_prices = []
-            for price in prices:
-                try:
-                    cleaned_prices.append(float(price.replace('₹', '').replace(',', '').strip()))
-                except:
-                    continue
+    matrix = load_price_matrix(platform, conn=conn)
+    if matrix.shape[1] < 2:
+        return []
 
-            # Check for price drops
-            if len(cleaned_prices) < 2:
-                continue  # Not enough data
+    prices = matrix.to_numpy()
+    valid = ~np.isnan(prices)
+
+    # Stable sort on the mask moves each row's valid prices to the right, in date order
+    packed = np.take_along_axis(prices, np.argsort(valid, axis=1, kind='stable'), axis=1)
+    counts = valid.sum(axis=1)
+    latest = packed[:, -1]
+    previous = packed[:, -2]
+    earlier = packed[:, :-1]
+    prior_min = np.where(np.isnan(earlier), np.inf, earlier).min(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        drop = previous - latest
+        drop_pct = drop / previous * 100
+        hit = (counts >= 2) & (drop >= min_drop_paise) & (drop_pct >= min_drop_pct)
+        new_low = latest < prior_min
+    if all_time_low:
+        hit &= new_low
+
+    return [
+        {
+            'srno': int(matrix.index[i]),
+            'previous_paise': int(previous[i]),
+            'current_paise': int(latest[i]),
+            'drop_paise': int(drop[i]),
+            'drop_pct': round(float(drop_pct[i]), 2),
+            'all_time_low': bool(new_low[i]),
+        }
+        for i in np.flatnonzero(hit)
+    ]
+
+def _chunks(items, size=500):
+    """Split items into lists small enough for a SQLite IN (...) clause."""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _drop_record(srno, previous, current, new_low):
+    drop = previous - current
+    return {
+        'srno': srno,
+        'previous_paise': previous,
+        'current_paise': current,
+        'drop_paise': drop,
+        'drop_pct': round(drop / previous * 100, 2),
+        'all_time_low': new_low,
+    }
 
-            price_changes = np.diff(cleaned_prices)
-            if any(change < 0 for change in price_changes):
-                price_drops.append(srno)
+def seed_price_alerts(conn, platform):
+    """
+    Resets the drop detector for a platform to the observations already
+    stored: each product's latest and lowest price become its state and the
+    cursor moves past them, so old drops are never reported.
+    """
+    upto_rowid = conn.execute("SELECT MAX(rowid) FROM price_observation").fetchone()[0] or 0
+    conn.execute("DELETE FROM price_alert_state WHERE platform = ?", (platform,))
+    conn.execute('''
+        INSERT INTO price_alert_state
+            (platform, product_id, last_price_paise, min_price_paise, last_alerted_paise, last_observed_at)
+        SELECT o.platform, o.product_id, o.price_paise, s.min_price_paise, NULL, o.observed_at
+        FROM (
+            SELECT product_id, MIN(price_paise) AS min_price_paise, MAX(observed_at) AS last_observed_at
+            FROM price_observation
+            WHERE platform = ? AND status = ? AND rowid <= ?
+            GROUP BY product_id
+        ) s
+        JOIN price_observation o
+            ON o.platform = ? AND o.product_id = s.product_id AND o.observed_at = s.last_observed_at
+    ''', (platform, PRICE_OK, upto_rowid, platform))
+    conn.execute("INSERT OR REPLACE INTO price_alert_cursor (platform, last_rowid) VALUES (?, ?)",
+                 (platform, upto_rowid))
+
+def detect_new_price_drops(platform, min_drop_paise=DROP_MIN_PAISE, min_drop_pct=DROP_MIN_PCT,
+                           all_time_low=False, conn=None):
+    """
+    Evaluates only the observations written since the previous call, against
+    per-product state (last price, running minimum, last alerted price).
+    A drop is reported once; it can fire again only after the price has gone
+    back above the alerted level. Returns one dict per dropped product.
+    """
+    own_conn = conn is None
+    conn = conn or get_price_history_db_connection()
+    try:
+        row = conn.execute("SELECT last_rowid FROM price_alert_cursor WHERE platform = ?", (platform,)).fetchone()
+        since_rowid = row[0] if row else 0
+        upto_rowid = conn.execute("SELECT MAX(rowid) FROM price_observation").fetchone()[0] or 0
+        if upto_rowid <= since_rowid:
+            return []
+
+        observations = conn.execute('''
+            SELECT product_id, observed_at, price_paise FROM price_observation
+            WHERE rowid > ? AND rowid <= ? AND platform = ? AND status = ?
+            ORDER BY product_id, observed_at
+        ''', (since_rowid, upto_rowid, platform, PRICE_OK)).fetchall()
+
+        state = {}
+        for chunk in _chunks({obs[0] for obs in observations}):
+            placeholders = ', '.join('?' for _ in chunk)
+            for st in conn.execute(f'''
+                SELECT product_id, last_price_paise, min_price_paise, last_alerted_paise, last_observed_at
+                FROM price_alert_state WHERE platform = ? AND product_id IN ({placeholders})
+            ''', [platform] + chunk):
+                state[st[0]] = list(st[1:])
+
+        drops = {}
+        for product_id, observed_at, price in observations:
+            st = state.get(product_id)
+            if st is None:
+                state[product_id] = [price, price, None, observed_at]
+                continue
+            last_price, min_price, last_alerted, last_observed_at = st
+            if observed_at < last_observed_at:
+                continue  # Backfilled history older than what was already evaluated
+
+            if last_alerted is not None and price > last_alerted:
+                last_alerted = None  # Price recovered; the next drop is a new one
+
+            drop = last_price - price
+            new_low = price < min_price
+            if (drop >= min_drop_paise and drop * 100 >= min_drop_pct * last_price
+                    and (new_low or not all_time_low)
+                    and (last_alerted is None or price < last_alerted)):
+                drops[product_id] = _drop_record(product_id, last_price, price, new_low)
+                last_alerted = price
+
+            state[product_id] = [price, min(min_price, price), last_alerted, observed_at]
+
+        conn.executemany('''
+            INSERT OR REPLACE INTO price_alert_state
+                (platform, product_id, last_price_paise, min_price_paise, last_alerted_paise, last_observed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(platform, product_id, *st) for product_id, st in state.items()])
+        conn.execute("INSERT OR REPLACE INTO price_alert_cursor (platform, last_rowid) VALUES (?, ?)",
+                     (platform, upto_rowid))
+        conn.commit()
 
-        return price_drops
+        # Skip drops that were already undone by a later observation in this batch
+        return [drop for product_id, drop in drops.items() if state[product_id][0] <= drop['current_paise']]
+    finally:
+        if own_conn:
+            conn.close()
 
+def notify(tablename, **thresholds):
+    """
+    Checks for new price drops in the specified table since the last call.
+    Returns the drops found by detect_new_price_drops.
+    """
+    try:
+        return detect_new_price_drops(TABLE_PLATFORMS[tablename], **thresholds)
     except Exception as e:
         logging.error(f"Error in notify function: {e}")
         return []
-    finally:
-        conn.close()
 
-def send_mail(to_email):
-    """
-    Sends an email notification to the specified email address.
-    """
-    from_email = "your_email@example.com"  # Replace with your email
-    password = "your_email_password"        # Replace with your email password or app-specific password
+# Email settings; override through the environment (e.g. a local debugging SMTP server)
+SMTP_HOST = os.environ.get('TRACKIT_SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.environ.get('TRACKIT_SMTP_PORT', 587))
+SMTP_USE_TLS = os.environ.get('TRACKIT_SMTP_TLS', '1') == '1'
+MAIL_FROM = os.environ.get('TRACKIT_MAIL_FROM', "your_email@example.com")            # Replace with your email
+MAIL_PASSWORD = os.environ.get('TRACKIT_MAIL_PASSWORD', "your_email_password")      # Or an app-specific password
 
-    # Create a multipart email message
+mailer = Mailer(SMTP_HOST, SMTP_PORT, username=MAIL_FROM if MAIL_PASSWORD else None,
+                password=MAIL_PASSWORD, use_tls=SMTP_USE_TLS)
+
+def _alert_message(to_email, body):
     msg = MIMEMultipart()
-    msg['From'] = from_email
+    msg['From'] = MAIL_FROM
     msg['To'] = to_email
     msg['Subject'] = "Price Drop Alert! 🎉"
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
 
+def send_mail(to_email):
+    """
+    Sends an email notification to the specified email address.
+    """
     body = '''
     Hey there,
 
@@ -402,26 +885,51 @@ def send_mail(to_email):
     Best regards,
     TrackIT Team
     '''
+    return mailer.send(_alert_message(to_email, body))
 
-    # Attach the email body to the message
-    msg.attach(MIMEText(body, 'plain'))
+def _product_details(alerts):
+    """Look up name and link for every (platform, drop) in alerts, one query per platform."""
+    srnos = {}
+    for user_alerts in alerts.values():
+        for platform, drop in user_alerts:
+            srnos.setdefault(platform, set()).add(drop['srno'])
 
+    details = {}
+    conn = get_price_history_db_connection()
     try:
-        # Connect to the Gmail SMTP server
-        server = smtplib.SMTP('smtp.gmail.com', 587)  # For Gmail
-        server.starttls()  # Upgrade to a secure connection
-        server.login(from_email, password)  # Log in to your email account
+        for platform, ids in srnos.items():
+            for chunk in _chunks(ids):
+                placeholders = ', '.join('?' for _ in chunk)
+                for row in conn.execute(
+                    f"SELECT srno, name, link FROM {PLATFORM_TABLES[platform]} WHERE srno IN ({placeholders})", chunk
+                ):
+                    details[(platform, row['srno'])] = (row['name'], row['link'])
+    finally:
+        conn.close()
+    return details
+
+def build_digest(to_email, user_alerts, details):
+    """One email listing every product of the user that dropped in this run."""
+    lines = []
+    for platform, drop in user_alerts:
+        name, link = details.get((platform, drop['srno']), (f"{platform.title()} product #{drop['srno']}", ''))
+        lines.append(
+            f"- {name} ({platform.title()}): ₹{drop['previous_paise'] / 100:,.2f} -> "
+            f"₹{drop['current_paise'] / 100:,.2f} (-{drop['drop_pct']}%)\n  {link}"
+        )
+    products = '\n'.join(lines)
+    body = f'''Hey there,
 
-        # Send the email
-        server.send_message(msg)
-        logging.info(f"Email sent successfully to {to_email}.")
+Good news! 📉 Prices dropped on {len(user_alerts)} of the products you're tracking:
 
-    except Exception as e:
-        logging.error(f"Failed to send email to {to_email}: {e}")
+{products}
 
-    finally:
-        # Close the server connection
-        server.quit()
+Check your dashboard to see the updated prices.
+
+Best regards,
+TrackIT Team
+'''
+    return _alert_message(to_email, body)
 
 
 # Database connection functions
@@ -442,6 +950,464 @@ def get_price_history_db_connection():
     conn.row_factory = sqlite3.Row
     return conn
 
+# Price history store
+#
+# Prices live in one long table, one row per (platform, product, observation),
+# instead of one column per day on amazon_data / flipkart_data.
+
+PLATFORM_TABLES = {'amazon': 'amazon_data', 'flipkart': 'flipkart_data'}
+TABLE_PLATFORMS = {table: platform for platform, table in PLATFORM_TABLES.items()}
+DATE_COLUMN_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+def init_price_store(conn):
+    """Create the product tables and the price_observation table if missing."""
+    cursor = conn.cursor()
+    for table in PLATFORM_TABLES.values():
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                srno INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                link TEXT NOT NULL UNIQUE
+            )
+        ''')
+    for table in PLATFORM_TABLES.values():
+        _ensure_columns(conn, table, PRODUCT_DETAIL_COLUMNS)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_observation (
+            product_id INTEGER NOT NULL,
+            platform TEXT NOT NULL,
+            observed_at TEXT NOT NULL,
+            price_paise INTEGER,
+            currency TEXT NOT NULL DEFAULT 'INR',
+            status INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (platform, product_id, observed_at)
+        )
+    ''')
+    _ensure_columns(conn, 'price_observation', {
+        'currency': "TEXT NOT NULL DEFAULT 'INR'",
+        'status': 'INTEGER NOT NULL DEFAULT 0',
+    })
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_price_observation_time
+        ON price_observation (platform, observed_at)
+    ''')
+    # Cross-platform matches, resolved once per Amazon product (see save_product_match)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_match (
+            amazon_srno INTEGER PRIMARY KEY,
+            flipkart_srno INTEGER,
+            flipkart_confidence REAL,
+            reliance_url TEXT,
+            reliance_name TEXT,
+            reliance_price_paise INTEGER,
+            reliance_confidence REAL,
+            matched_at TEXT NOT NULL,
+            checked_at TEXT
+        )
+    ''')
+    # Running per-product price statistics, updated by record_prices
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_feature (
+            platform TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            price_sum REAL NOT NULL,
+            price_sumsq REAL NOT NULL,
+            min_paise INTEGER NOT NULL,
+            max_paise INTEGER NOT NULL,
+            last_paise INTEGER NOT NULL,
+            last_change_at TEXT,
+            last_observed_at TEXT NOT NULL,
+            PRIMARY KEY (platform, product_id)
+        )
+    ''')
+    # Drop probabilities precomputed for every product (see training.precompute_predictions)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_prediction (
+            platform TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            drop_probability INTEGER NOT NULL,
+            model_version TEXT NOT NULL,
+            predicted_at TEXT NOT NULL,
+            PRIMARY KEY (platform, product_id)
+        )
+    ''')
+    # Incremental drop detector state (see detect_new_price_drops)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_alert_state (
+            platform TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            last_price_paise INTEGER NOT NULL,
+            min_price_paise INTEGER NOT NULL,
+            last_alerted_paise INTEGER,
+            last_observed_at TEXT NOT NULL,
+            PRIMARY KEY (platform, product_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_alert_cursor (
+            platform TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL
+        )
+    ''')
+    # Existing history is the baseline for alerts, not a batch of new drops
+    seeded = {row[0] for row in conn.execute("SELECT platform FROM price_alert_cursor").fetchall()}
+    for platform in PLATFORM_TABLES:
+        if platform not in seeded:
+            seed_price_alerts(conn, platform)
+    conn.commit()
+
+    # Backfill the feature store once for databases that predate it
+    has_features = conn.execute("SELECT EXISTS (SELECT 1 FROM price_feature)").fetchone()[0]
+    if not has_features and conn.execute("SELECT EXISTS (SELECT 1 FROM price_observation)").fetchone()[0]:
+        rebuild_price_features(conn)
+        conn.commit()
+
+# Price status codes stored next to every observation
+PRICE_OK = 0            # price_paise holds a valid price
+PRICE_UNAVAILABLE = 1   # Scraper found no price ('N/A', 0, out of stock)
+PRICE_UNPARSEABLE = 2   # Scraper returned text that is not a price
+PRICE_FAILED = 3        # Page could not be scraped (error, empty page, platform paused)
+
+CURRENCY_SYMBOLS = {'₹': 'INR', 'Rs': 'INR', 'INR': 'INR', '$': 'USD'}
+PRICE_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+def normalize_price(raw):
+    """
+    Converts a scraped price like '₹1,299.00' to (price_paise, currency, status).
+    This is the only place scraped price text is parsed.
+    """
+    if raw is None:
+        return None, 'INR', PRICE_UNAVAILABLE
+    if isinstance(raw, (int, float)):
+        if raw != raw or raw <= 0:  # NaN or placeholder zero
+            return None, 'INR', PRICE_UNAVAILABLE
+        return int(round(raw * 100)), 'INR', PRICE_OK
+
+    text = str(raw).strip()
+    if not text or text.upper() == 'N/A':
+        return None, 'INR', PRICE_UNAVAILABLE
+
+    currency = 'INR'
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in text:
+            currency = code
+            break
+
+    match = PRICE_RE.search(text)
+    if not match:
+        return None, currency, PRICE_UNPARSEABLE
+    value = float(match.group().replace(',', ''))
+    if value <= 0:
+        return None, currency, PRICE_UNAVAILABLE
+    return int(round(value * 100)), currency, PRICE_OK
+
+def _ensure_columns(conn, table, columns):
+    """Add any missing columns (name -> SQL type/default) to an existing table."""
+    existing = {col[1] for col in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+def record_prices(conn, platform, rows, observed_at=None):
+    """
+    Normalizes and stores one observation per (product_id, raw_price) pair
+    in rows. The caller owns the transaction.
+    """
+    observed_at = observed_at or datetime.now().isoformat(timespec='seconds')
+    observations = []
+    for product_id, raw_price in rows:
+        price_paise, currency, status = normalize_price(raw_price)
+        observations.append((product_id, platform, observed_at, price_paise, currency, status))
+
+    # A rerun in the same second replaces observations; those products are recomputed below
+    recorded = {row[0] for row in conn.execute(
+        "SELECT product_id FROM price_observation WHERE platform = ? AND observed_at = ?",
+        (platform, observed_at)
+    ).fetchall()}
+
+    conn.executemany(
+        '''
+        INSERT OR REPLACE INTO price_observation
+            (product_id, platform, observed_at, price_paise, currency, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''',
+        observations
+    )
+    update_price_features(conn, platform, [
+        (product_id, price_paise, observed_at)
+        for product_id, _, observed_at, price_paise, _, status in observations
+        if status == PRICE_OK and product_id not in recorded
+    ])
+    replaced = recorded & {product_id for product_id, *_ in observations}
+    if replaced:
+        rebuild_price_features(conn, platform, replaced)
+
+def record_failed_scrapes(conn, platform, product_ids, observed_at=None):
+    """
+    Stores a PRICE_FAILED observation for each product whose refresh read
+    no page, so the scheduler counts the attempt. The caller owns the transaction.
+    """
+    observed_at = observed_at or datetime.now().isoformat(timespec='seconds')
+    conn.executemany(
+        '''
+        INSERT OR IGNORE INTO price_observation
+            (product_id, platform, observed_at, price_paise, currency, status)
+        VALUES (?, ?, ?, NULL, 'INR', ?)
+        ''',
+        [(product_id, platform, observed_at, PRICE_FAILED) for product_id in product_ids]
+    )
+
+def update_price_features(conn, platform, rows):
+    """
+    Folds (product_id, price_paise, observed_at) rows into price_feature in
+    O(1) per row. An out-of-order observation updates the totals but not
+    the latest price.
+    """
+    conn.executemany(
+        '''
+        INSERT INTO price_feature
+            (platform, product_id, n, price_sum, price_sumsq, min_paise, max_paise,
+             last_paise, last_change_at, last_observed_at)
+        VALUES (?, ?, 1, ?, ?, ?, ?, ?, NULL, ?)
+        ON CONFLICT (platform, product_id) DO UPDATE SET
+            n = n + 1,
+            price_sum = price_sum + excluded.price_sum,
+            price_sumsq = price_sumsq + excluded.price_sumsq,
+            min_paise = MIN(min_paise, excluded.min_paise),
+            max_paise = MAX(max_paise, excluded.max_paise),
+            last_change_at = CASE
+                WHEN excluded.last_observed_at >= last_observed_at AND excluded.last_paise != last_paise
+                THEN excluded.last_observed_at ELSE last_change_at END,
+            last_paise = CASE
+                WHEN excluded.last_observed_at >= last_observed_at
+                THEN excluded.last_paise ELSE last_paise END,
+            last_observed_at = MAX(last_observed_at, excluded.last_observed_at)
+        ''',
+        [(platform, product_id, price_paise / 100, (price_paise / 100) ** 2, price_paise, price_paise,
+          price_paise, observed_at) for product_id, price_paise, observed_at in rows]
+    )
+
+def rebuild_price_features(conn, platform=None, product_ids=None):
+    """
+    Recompute price_feature from price_observation: everything (backfill or
+    repair), or just the given products of one platform.
+    """
+    scope = "1"
+    params = []
+    if platform is not None:
+        scope += " AND platform = ?"
+        params.append(platform)
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        scope += f" AND product_id IN ({', '.join('?' for _ in product_ids)})"
+        params += product_ids
+    obs = pd.read_sql_query(
+        f'''
+        SELECT platform, product_id, observed_at, price_paise FROM price_observation
+        WHERE {scope} AND status = ? AND price_paise IS NOT NULL
+        ORDER BY platform, product_id, observed_at
+        ''',
+        conn, params=params + [PRICE_OK]
+    )
+    obs['rupees'] = obs['price_paise'] / 100
+    obs['rupees_sq'] = obs['rupees'] ** 2
+    grouped = obs.groupby(['platform', 'product_id'])
+    previous = grouped['price_paise'].shift()
+    changed = obs[previous.notna() & obs['price_paise'].ne(previous)]
+
+    features = grouped.agg(
+        n=('price_paise', 'size'),
+        price_sum=('rupees', 'sum'),
+        price_sumsq=('rupees_sq', 'sum'),
+        min_paise=('price_paise', 'min'),
+        max_paise=('price_paise', 'max'),
+        last_paise=('price_paise', 'last'),
+        last_observed_at=('observed_at', 'last'),
+    )
+    features['last_change_at'] = changed.groupby(['platform', 'product_id'])['observed_at'].max()
+    features = features.astype(object).where(features.notna(), None)
+
+    conn.execute(f"DELETE FROM price_feature WHERE {scope}", params)
+    conn.executemany(
+        '''
+        INSERT INTO price_feature
+            (platform, product_id, n, price_sum, price_sumsq, min_paise, max_paise,
+             last_paise, last_change_at, last_observed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        [(platform, int(product_id), int(row.n), float(row.price_sum), float(row.price_sumsq),
+          int(row.min_paise), int(row.max_paise), int(row.last_paise), row.last_change_at, row.last_observed_at)
+         for (platform, product_id), row in features.iterrows()]
+    )
+    logging.info(f"Rebuilt price features for {len(features)} products.")
+
+# Latest scraped details kept on the product tables (prices go to price_observation)
+PRODUCT_DETAIL_COLUMNS = {
+    'image': 'TEXT',
+    'star_rating': 'TEXT',
+    'reviews': 'TEXT',
+    'availability': 'TEXT',
+    'updated_at': 'TEXT',
+}
+
+def record_products(conn, platform, rows, observed_at=None):
+    """
+    Stores everything scraped for each (product_id, record) pair in rows:
+    the price as an observation and the other fields on the product row.
+    The caller owns the transaction.
+    """
+    observed_at = observed_at or datetime.now().isoformat(timespec='seconds')
+    conn.executemany(
+        f'''
+        UPDATE {PLATFORM_TABLES[platform]}
+        SET image = ?, star_rating = ?, reviews = ?, availability = ?, updated_at = ?
+        WHERE srno = ?
+        ''',
+        [(record.get('image'), record.get('star_rating'), record.get('reviews'),
+          record.get('availability'), observed_at, product_id) for product_id, record in rows]
+    )
+    record_prices(conn, platform, [(product_id, record.get('price')) for product_id, record in rows], observed_at)
+
+def _date_columns(conn, table):
+    cursor = conn.execute(f"PRAGMA table_info({table})")
+    return [col[1] for col in cursor.fetchall() if DATE_COLUMN_RE.match(col[1])]
+
+def migrate_wide_tables(conn=None):
+    """
+    One-shot migration of the old one-column-per-day tables into
+    price_observation. The date columns are dropped once copied.
+    """
+    own_conn = conn is None
+    conn = conn or get_price_history_db_connection()
+    try:
+        init_price_store(conn)
+        for platform, table in PLATFORM_TABLES.items():
+            date_columns = _date_columns(conn, table)
+            if not date_columns:
+                continue
+
+            quoted = ', '.join(f'"{col}"' for col in date_columns)
+            rows = conn.execute(f"SELECT srno, {quoted} FROM {table}").fetchall()
+            observations = []
+            for row in rows:
+                for day, price in zip(date_columns, tuple(row)[1:]):
+                    if price is None or price == 0:
+                        continue  # Day was never scraped
+                    price_paise, currency, status = normalize_price(price)
+                    observations.append((row[0], platform, f"{day}T00:00:00", price_paise, currency, status))
+
+            conn.executemany(
+                '''
+                INSERT OR IGNORE INTO price_observation
+                    (product_id, platform, observed_at, price_paise, currency, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                observations
+            )
+
+            # Rebuild the product table without the per-day columns
+            conn.execute(f"ALTER TABLE {table} RENAME TO {table}_wide")
+            init_price_store(conn)
+            conn.execute(f"INSERT INTO {table} (srno, name, link) SELECT srno, name, link FROM {table}_wide")
+            conn.execute(f"DROP TABLE {table}_wide")
+            conn.commit()
+            logging.info(f"Migrated {len(observations)} prices from {len(date_columns)} date columns of {table}.")
+            rebuild_price_features(conn, platform)
+            seed_price_alerts(conn, platform)
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
+
+def load_price_matrix(platform, product_ids=None, since=None, conn=None):
+    """
+    Returns a product_id x day DataFrame of prices in paise (NaN where a day
+    has no valid price), read in one query from price_observation.
+    """
+    own_conn = conn is None
+    conn = conn or get_price_history_db_connection()
+    try:
+        query = '''
+            SELECT product_id, substr(observed_at, 1, 10) AS day, price_paise
+            FROM price_observation
+            WHERE platform = ? AND status = ?
+        '''
+        params = [platform, PRICE_OK]
+        if product_ids is not None:
+            query += f" AND product_id IN ({', '.join('?' for _ in product_ids)})"
+            params += list(product_ids)
+        if since is not None:
+            query += " AND observed_at >= ?"
+            params.append(str(since))
+        query += " ORDER BY observed_at"
+        prices = pd.read_sql_query(query, conn, params=params)
+    finally:
+        if own_conn:
+            conn.close()
+
+    # Keep the latest observation of each day
+    matrix = prices.pivot_table(index='product_id', columns='day', values='price_paise', aggfunc='last')
+    matrix.columns = [str(col) for col in matrix.columns]
+    return matrix.astype(float)
+
+def load_price_features(platform, product_ids=None, conn=None):
+    """
+    Returns the model features per product (index product_id) from the
+    price_feature store: n, avg_price, price_std, price_change, last_paise
+    and last_change_at. Products with fewer than two valid prices are left out.
+    """
+    own_conn = conn is None
+    conn = conn or get_price_history_db_connection()
+    try:
+        query = '''
+            SELECT product_id, n, price_sum, price_sumsq, min_paise, max_paise, last_paise, last_change_at
+            FROM price_feature
+            WHERE platform = ? AND n >= 2
+        '''
+        params = [platform]
+        if product_ids is not None:
+            query += f" AND product_id IN ({', '.join('?' for _ in product_ids)})"
+            params += list(product_ids)
+        store = pd.read_sql_query(query, conn, params=params, index_col='product_id')
+    finally:
+        if own_conn:
+            conn.close()
+
+    n = store['n']
+    avg_price = store['price_sum'] / n
+    # Sample variance (ddof=1) from the running sums, like DataFrame.std
+    variance = ((store['price_sumsq'] - n * avg_price ** 2) / (n - 1)).clip(lower=0)
+    return pd.DataFrame({
+        'n': n,
+        'avg_price': avg_price,
+        'price_std': np.sqrt(variance),
+        'price_change': (store['max_paise'] - store['min_paise']) / store['max_paise'],
+        'last_paise': store['last_paise'],
+        'last_change_at': store['last_change_at'],
+    }, index=store.index)
+
+def load_price_history(platform, product_ids=None, since=None, conn=None):
+    """
+    Returns a DataFrame with srno, name, link and one column per day (rupees),
+    built only from the observations of the requested products.
+    """
+    own_conn = conn is None
+    conn = conn or get_price_history_db_connection()
+    try:
+        query = f"SELECT srno, name, link FROM {PLATFORM_TABLES[platform]}"
+        params = []
+        if product_ids is not None:
+            query += f" WHERE srno IN ({', '.join('?' for _ in product_ids)})"
+            params = list(product_ids)
+        products = pd.read_sql_query(query, conn, params=params)
+        history = load_price_matrix(platform, product_ids, since, conn) / 100
+    finally:
+        if own_conn:
+            conn.close()
+
+    return products.merge(history, how='left', left_on='srno', right_index=True)
+
 # Functions to add new products to the databases
 
 def add_new_amazon(link):
@@ -449,16 +1415,16 @@ def add_new_amazon(link):
     Adds a new Amazon product to the amazon_data table.
     """
     conn = get_price_history_db_connection()
-    cursor = conn.cursor()
 
     try:
         # Scrape the product details
         product = scrape_amazon_product(link)
         name = product.get('name', 'N/A')
-        price = product.get('price', 'N/A')
 
-        # Insert into amazon_data
-        cursor.execute("INSERT OR IGNORE INTO amazon_data (name, link) VALUES (?, ?)", (name, link))
+        # Insert into amazon_data along with its first price
+        srno = add_product(conn, 'amazon', name, link)
+        if product and not product.get('cached'):
+            record_products(conn, 'amazon', [(srno, product)])
         conn.commit()
 
         logging.info(f"Added new Amazon product: {name} with link: {link}")
@@ -473,16 +1439,16 @@ def add_new_flipkart(link):
     Adds a new Flipkart product to the flipkart_data table.
     """
     conn = get_price_history_db_connection()
-    cursor = conn.cursor()
 
     try:
         # Scrape the product details
         product = scrape_flipkart_product(link)
         name = product.get('name', 'N/A')
-        price = product.get('price', 'N/A')
 
-        # Insert into flipkart_data
-        cursor.execute("INSERT OR IGNORE INTO flipkart_data (name, link) VALUES (?, ?)", (name, link))
+        # Insert into flipkart_data along with its first price
+        srno = add_product(conn, 'flipkart', name, link)
+        if product and not product.get('cached'):
+            record_products(conn, 'flipkart', [(srno, product)])
         conn.commit()
 
         logging.info(f"Added new Flipkart product: {name} with link: {link}")
@@ -504,183 +1470,160 @@ def make_list(tablename,columname):
 
 
 def send_alert_mail():
-    user=make_list("user","email")
-    nf=notify("flipkart_data")
-
-    for i in user :
-        for j in nf :
-            if does_user_have(i,"srno_f",j):
-                send_mail(i,"srno_f",j)
-                break
-
-    nf=notify("amazon_data")
-
-    for i in user :
-        for j in nf :
-            if does_user_have(i,"srno_a",j):
-                send_mail(i,"srno_a",j)
-                break
-
-def update_table_values_amazon():
-    add_column("amazon_data")
-    date_=str(date.today())
-
-    conn = sqlite3.connect("databases_price_history.db")
-    cursor = conn.cursor()
-    column_data=[]
-
-    try :
-        cursor.execute(f"select link from amazon_data")
-        rows=cursor.fetchall()
-        column_data = [row[0] for row in rows]
+    """
+    Emails every user watching a product whose price dropped since the last
+    run, one digest per user. Returns the alerts, keyed by email.
+    """
+    alerts = {}
+    for tablename, platform in TABLE_PLATFORMS.items():
+        drops = notify(tablename)
+        for email, user_drops in watchers_for_drops(platform, drops).items():
+            alerts.setdefault(email, []).extend((platform, drop) for drop in user_drops)
+
+    if alerts:
+        details = _product_details(alerts)
+        sent, failed = mailer.send_many(
+            [build_digest(email, user_alerts, details) for email, user_alerts in alerts.items()]
+        )
+        logging.info(f"Price drop digests: {sent} sent, {failed} failed.")
+    return alerts
+
+# Catalog refresh settings
+REFRESH_WORKERS = DRIVER_POOL_SIZE   # Scrapes in flight per table
+HOST_CONCURRENCY = {                 # Max concurrent pages per host
+    'www.amazon.in': 2,
+    'www.flipkart.com': 2,
+}
+DEFAULT_HOST_CONCURRENCY = 2
+WRITE_BATCH_SIZE = 200               # Price updates per transaction
+ASYNC_PER_DOMAIN = 16                # Async HTTP fetches in flight per domain
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def _host_slot(url):
+    """Return the semaphore limiting concurrent scrapes against the url's host."""
+    host = urlparse(url).netloc.lower()
+    with _host_slots_lock:
+        if host not in _host_slots:
+            limit = HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY)
+            _host_slots[host] = threading.BoundedSemaphore(limit)
+        return _host_slots[host]
+
+def _scrape_limited(scraper, *args):
+    # The url is always the last argument
+    with _host_slot(args[-1]):
+        return scraper(*args)
+
+def refresh_table(tablename, scraper, workers=None, srnos=None):
+    """
+    Refreshes every link in the table (or only the products in `srnos`) and
+    records the scraped details. Pages are
+    crawled over async HTTP first; the ones that need a browser are scraped
+    with `scraper` on a thread pool. Writes are batched into a few
+    transactions. Returns the run's stats.
+    """
+    platform = TABLE_PLATFORMS[tablename]
+    workers = workers or REFRESH_WORKERS
+    observed_at = datetime.now().isoformat(timespec='seconds')
 
-        for i in column_data:
-            price,name =scrape_amazon(i)
-            
-            query = f'''
-                    update amazon_data
-                    set  \"{date_}\" = ?
-                    where link = ?
-                    '''
-            cursor.execute(query,(price,i))
+    conn = get_price_history_db_connection()
+    pending = []
+    unscraped = []  # Failed or skipped products, recorded as attempts
+    scraped = failed = skipped = browser_pages = 0
+    started = time.monotonic()
+
+    def flush(force=False):
+        nonlocal pending
+        if pending and (force or len(pending) >= WRITE_BATCH_SIZE):
+            record_products(conn, platform, pending, observed_at)
             conn.commit()
-    finally:
-        # Close the database connection
-        conn.close()
+            pending = []
 
-#fn to update flipkart_data table value ( will also add a column of todays date )
-
-def update_table_values_flipkart():
-    add_column("flipkart_data")
-    date_=str(date.today())
+    try:
+        if srnos is None:
+            rows = conn.execute(f"SELECT srno, link FROM {tablename}").fetchall()
+        else:
+            rows = []
+            for chunk in _chunks(list(srnos)):
+                placeholders = ', '.join('?' for _ in chunk)
+                rows += conn.execute(f"SELECT srno, link FROM {tablename} WHERE srno IN ({placeholders})", chunk).fetchall()
+
+        # Fast path for the whole table in one event loop
+        crawled = crawl_products(platform, [row['link'] for row in rows], per_domain=ASYNC_PER_DOMAIN)
+        fallback = []
+        for row in rows:
+            details = crawled.get(row['link'])
+            if details:
+                record_path(platform, 'http')
+                response_cache.set(_page_key(platform, row['link']), details, ttl=PAGE_CACHE_TTL)
+                scraped += 1
+                pending.append((row['srno'], details))
+                flush()
+            else:
+                fallback.append(row)
 
-    conn = sqlite3.connect("databases_price_history.db")
-    cursor = conn.cursor()
-    column_data=[]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_scrape_limited, _guarded_scrape, platform, scraper, row['link']): row
+                       for row in fallback}
+            for future in as_completed(futures):
+                row = futures[future]
+                try:
+                    details = future.result()
+                except CircuitOpenError:
+                    skipped += 1
+                    unscraped.append(row['srno'])
+                    continue
+                except Exception as e:
+                    details = None
+                    logging.error(f"Refresh of {row['link']} failed: {e}")
+                record_path(platform, 'selenium')
+                browser_pages += 1
+                if not details:
+                    failed += 1
+                    unscraped.append(row['srno'])
+                    continue
 
-    try :
-        cursor.execute(f"select link from flipkart_data")
-        rows=cursor.fetchall()
-        column_data = [row[0] for row in rows]
+                scraped += 1
+                response_cache.set(_page_key(platform, row['link']), details, ttl=PAGE_CACHE_TTL)
+                pending.append((row['srno'], details))
+                flush()
 
-        for i in column_data:
-            price , name =scrape_flipkart(i)
-            
-            query = f'''
-                    update flipkart_data
-                    set  \"{date_}\" = ?
-                    where link = ?
-                    '''
-            cursor.execute(query,(price,i))
+        flush(force=True)
+        if unscraped:
+            record_failed_scrapes(conn, platform, unscraped, observed_at)
             conn.commit()
     finally:
         # Close the database connection
         conn.close()
 
+    elapsed = time.monotonic() - started
+    stats = {
+        'table': tablename,
+        'pages': scraped,
+        'failed': failed,
+        'skipped': skipped,
+        'failure_rate': round(failed / (scraped + failed), 3) if scraped + failed else 0.0,
+        'browser_pages': browser_pages,
+        'seconds': round(elapsed, 1),
+        'pages_per_min': round((scraped + failed) / elapsed * 60, 1) if elapsed else 0.0,
+    }
+    logging.info(f"Refreshed {tablename}: {stats}")
+    return stats
 
-def add_column(tablename):
-
-    date__= str(date.today())
-    
-    try:
-        conn = sqlite3.connect("databases_price_history.db")
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            alter table {tablename}
-            add column "{date__}" int default 0 """ 
-        )
-    except sqlite3.Error as e:
-        print(f"An error occurred: {e}")
-    
-    finally:
-        if conn:
-            conn.close()
-
-def scrape_flipkart(url):
-    driver = create_driver()
-    try:
-        logging.info(f"Navigating to Flipkart URL: {url}")
-        driver.get(url)
-        
-        wait = WebDriverWait(driver, 10)  # Increased wait time
-        
-        # Handle potential login pop-up
-        try:
-            logging.info("Checking for login pop-up...")
-            close_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'✕')]")))
-            close_button.click()
-            logging.info("Login pop-up closed.")
-        except:
-            logging.info("No login pop-up detected.")
-        
-        # Wait for the product name to be present
-        name_tag = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'span.VU-ZEz')))
-        name = name_tag.text.strip()
-        logging.info(f"Product Name: {name}")
-
-        # Extract price using CSS_SELECTOR
-        try:
-            price_tag = driver.find_element(By.CSS_SELECTOR, 'div.Nx9bqj.CxhGGd')
-            price = price_tag.text.strip()
-            logging.info(f"Price: {price}")
-        except:
-            price = 'N/A'
-            logging.warning("Price element not found.")
-     
-
-    except Exception as err:
-        logging.error(f"An error occurred while scraping Flipkart: {err}")
-        # Capture screenshot for debugging
-        screenshot_path = os.path.join(os.getcwd(), "flipkart_error_screenshot.png")
-        driver.save_screenshot(screenshot_path)
-        logging.info(f"Screenshot saved to {screenshot_path}")
-    finally:
-        driver.quit()
-
-    return price,name
-
-# fn to scrape amazon
-
-def scrape_amazon(url):
-    driver = create_driver()
-    product_details = {}
-    
+# Browser fallback used when refreshing each platform's table
+REFRESH_SCRAPERS = {
+    'amazon': _scrape_amazon_product_selenium,
+    'flipkart': _scrape_flipkart_product_selenium,
+}
 
-    try:
-        logging.info(f"Navigating to Amazon URL: {url}")
-        driver.get(url)
-        
-        wait = WebDriverWait(driver, 5)  # Increased wait time
-        
-        # Wait for the product title to be present
-        name_tag = wait.until(EC.presence_of_element_located((By.ID, 'productTitle')))
-        name = name_tag.text.strip()
-        logging.info(f"Product Name: {name}")
+def update_table_values_amazon(workers=None):
+    return refresh_table("amazon_data", _scrape_amazon_product_selenium, workers)
 
-        # Extract price using a more precise CSS selector
-        try:
-            price_tag = driver.find_element(By.CSS_SELECTOR, 'span.a-price.aok-align-center.reinventPricePriceToPayMargin.priceToPay')
-            price = price_tag.text.strip()
-            logging.info(f"Price: ₹{price}")
-        except:
-            try:
-                price_tag = driver.find_element(By.ID, 'priceblock_dealprice')
-                price = price_tag.text.strip()
-                logging.info(f"Price: ₹{price}")
-            except:
-                price = 'N/A'
-                logging.warning("Price element not found.")
-        
-    except Exception as err:
-        logging.error(f"An error occurred while scraping Amazon: {err}")
-        # Capture screenshot for debugging
-        screenshot_path = os.path.join(os.getcwd(), "amazon_error_screenshot.png")
-        driver.save_screenshot(screenshot_path)
-        logging.info(f"Screenshot saved to {screenshot_path}")
-    finally:
-        driver.quit()
-    return price,name
+#fn to update flipkart_data table value
 
+def update_table_values_flipkart(workers=None):
+    return refresh_table("flipkart_data", _scrape_flipkart_product_selenium, workers)
 
 
 def db_to_excel(db_name, table_name, excel_file_name):
@@ -688,8 +1631,12 @@ def db_to_excel(db_name, table_name, excel_file_name):
     conn = sqlite3.connect(db_name)
     
     try:
-        query = f"SELECT * FROM {table_name}"
-        df = pd.read_sql_query(query, conn)
+        if table_name in TABLE_PLATFORMS:
+            # Price history is stored long; export it as one column per day
+            df = load_price_history(TABLE_PLATFORMS[table_name], conn=conn)
+        else:
+            query = f"SELECT * FROM {table_name}"
+            df = pd.read_sql_query(query, conn)
         
         df.to_excel(excel_file_name, index=False)
         print(f"Table '{table_name}' has been successfully exported to '{excel_file_name}'.")
@@ -701,12 +1648,32 @@ def db_to_excel(db_name, table_name, excel_file_name):
         conn.close()
 
 
-def update():
-    update_table_values_amazon()
-    update_table_values_flipkart()
-    print(notify("flipkart_data"))
-    print(notify("amazon_data"))
+def update(workers=None):
+    # Refresh both platforms and the matched Reliance pages side by side; the
+    # driver pool bounds total browsers
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        amazon = executor.submit(update_table_values_amazon, workers)
+        flipkart = executor.submit(update_table_values_flipkart, workers)
+        reliance = executor.submit(refresh_reliance_matches, workers)
+        runs = [amazon.result(), flipkart.result()]
+        matches = reliance.result()
+
+    pages = sum(run['pages'] + run['failed'] for run in runs)
+    seconds = max(run['seconds'] for run in runs)
+    rate = round(pages / seconds * 60, 1) if seconds else 0.0
+    failed = sum(run['failed'] for run in runs)
+    skipped = sum(run['skipped'] for run in runs)
+    failure_rate = round(failed / pages * 100, 1) if pages else 0.0
+    print(f"Refreshed {pages} pages in {seconds}s ({rate} pages/min), "
+          f"{failure_rate}% failed, {skipped} skipped while paused")
+    for run in runs:
+        print(run)
+    print(matches)
+    # notify() only reports each drop once, so let the alert pass consume them
     send_alert_mail()
+    # Fresh prices change the features the dashboard's drop probabilities come from
+    from training import precompute_predictions  # training imports this module
+    print(f"Precomputed {precompute_predictions()} drop probabilities")
 # Commit on 2024-12-11T09:31:00+05:30
 # Commit on 2024-12-12T12:59:00+05:30
 # Commit on 2024-12-12T12:04:00+05:30
@@ -0,0 +1,208 @@
+# http_fetch.py
+
+import json
+import logging
+import threading
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from selector_registry import registry, is_xpath
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+}
+HTTP_TIMEOUT = 10  # Seconds
+
+_local = threading.local()
+
+
+def get_session():
+    """One keep-alive session per thread, so connections are reused across scrapes."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+def fetch_soup(url, timeout=HTTP_TIMEOUT):
+    """GET a page over the pooled session; returns parsed soup or None."""
+    try:
+        response = get_session().get(url, timeout=timeout)
+    except requests.RequestException as e:
+        logging.warning(f"HTTP fetch of {url} failed: {e}")
+        return None
+    if response.status_code != 200:
+        logging.info(f"HTTP fetch of {url} returned {response.status_code}")
+        return None
+    return BeautifulSoup(response.content, HTML_PARSER)
+
+
+def _attr(soup, attr, *selectors):
+    for selector in selectors:
+        tag = soup.select_one(selector)
+        if tag and tag.get(attr):
+            return tag[attr].strip()
+    return None
+
+
+def _field(soup, platform, field, attr=None):
+    """First match among the registry's selectors for a field; records hits and misses."""
+    for selector in registry.selectors(platform, field):
+        if is_xpath(selector):
+            continue  # Browser-only selector
+        tag = soup.select_one(selector)
+        value = (tag.get(attr) if attr else tag.get_text(strip=True)) if tag else None
+        registry.record(platform, field, selector, bool(value))
+        if value:
+            return value.strip()
+    return None
+
+
+# Every scraper, HTTP or Selenium, returns this record; missing fields are 'N/A'
+PRODUCT_FIELDS = ('name', 'price', 'image', 'star_rating', 'reviews', 'availability', 'link')
+
+
+def product_record(**fields):
+    """A product dict with exactly PRODUCT_FIELDS."""
+    unknown = set(fields) - set(PRODUCT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown product fields: {sorted(unknown)}")
+    return {field: fields.get(field) or 'N/A' for field in PRODUCT_FIELDS}
+
+
+def star_rating(rating):
+    """'4.3' -> '4.3 out of 5 stars'; Amazon's alt text already reads that way."""
+    if not rating or rating == 'N/A':
+        return None
+    return rating if 'out of 5' in rating else rating + " out of 5 stars"
+
+
+# Page parsers: return a product_record, or None when the price selector is
+# missing (JS-rendered page, bot wall, layout change).
+
+def parse_amazon(soup, url):
+    price = _field(soup, 'amazon', 'price')
+    name = _field(soup, 'amazon', 'name')
+    if not price or not name:
+        return None
+
+    return product_record(
+        name=name,
+        price=price,
+        image=_field(soup, 'amazon', 'image', 'src'),
+        star_rating=star_rating(_field(soup, 'amazon', 'star_rating')),
+        reviews=_field(soup, 'amazon', 'reviews'),
+        availability=_field(soup, 'amazon', 'availability'),
+        link=url,
+    )
+
+
+def parse_flipkart(soup, url):
+    price = _field(soup, 'flipkart', 'price')
+    name = _field(soup, 'flipkart', 'name')
+    if not price or not name:
+        return None
+    return product_record(
+        name=name,
+        price=price,
+        image=_field(soup, 'flipkart', 'image', 'src'),
+        star_rating=star_rating(_field(soup, 'flipkart', 'star_rating')),
+        reviews=_field(soup, 'flipkart', 'reviews'),
+        # Flipkart only shows a banner when the product is unavailable
+        availability=_field(soup, 'flipkart', 'availability') or 'In stock',
+        link=url,
+    )
+
+
+def parse_reliance_search(soup, url):
+    price = _field(soup, 'reliance', 'price')
+    name = _field(soup, 'reliance', 'name')
+    if not price or not name:
+        return None
+    link = _field(soup, 'reliance', 'link', 'href')
+    if link and link.startswith('/'):
+        link = 'https://www.reliancedigital.in' + link
+    return product_record(name=name, price=price, link=link)
+
+
+def parse_reliance_product(soup, url):
+    """Product pages carry schema.org JSON-LD, which is steadier than class names."""
+    for script in soup.select('script[type="application/ld+json"]'):
+        try:
+            data = json.loads(script.string or '')
+        except ValueError:
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            if not isinstance(item, dict) or item.get('@type') != 'Product':
+                continue
+            offers = item.get('offers') or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            price = offers.get('price') or offers.get('lowPrice')
+            if item.get('name') and price:
+                rating = item.get('aggregateRating') or {}
+                image = item.get('image')
+                if isinstance(image, list):
+                    image = image[0] if image else None
+                return product_record(
+                    name=item['name'].strip(),
+                    price=str(price),
+                    image=image if isinstance(image, str) else None,
+                    star_rating=f"{rating['ratingValue']} out of 5 stars" if rating.get('ratingValue') else None,
+                    reviews=str(rating.get('reviewCount') or '') or None,
+                    availability=(offers.get('availability') or '').rsplit('/', 1)[-1] or None,
+                    link=url,
+                )
+
+    price = _attr(soup, 'content', 'meta[property="product:price:amount"]')
+    name = _attr(soup, 'content', 'meta[property="og:title"]')
+    if not price or not name:
+        return None
+    return product_record(name=name, price=price, image=_attr(soup, 'content', 'meta[property="og:image"]'), link=url)
+
+
+PARSERS = {
+    'amazon': parse_amazon,
+    'flipkart': parse_flipkart,
+    'reliance': parse_reliance_search,
+    'reliance_product': parse_reliance_product,
+}
+
+
+def fetch_product(platform, url):
+    """Fast path: plain HTTP + HTML parsing. None means escalate to Selenium."""
+    soup = fetch_soup(url)
+    if soup is None:
+        return None
+    return PARSERS[platform](soup, url)
+
+
+# How often each platform was served by the HTTP path vs. the Selenium fallback
+_path_counts = {}
+_path_lock = threading.Lock()
+
+
+def record_path(platform, path):
+    with _path_lock:
+        counts = _path_counts.setdefault(platform, {'http': 0, 'selenium': 0})
+        counts[path] += 1
+
+
+def path_stats():
+    with _path_lock:
+        return {platform: dict(counts) for platform, counts in _path_counts.items()}
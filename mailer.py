@@ -0,0 +1,121 @@
+# mailer.py
+
+import logging
+import queue
+import smtplib
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket shared by all sender threads."""
+
+    def __init__(self, rate_per_sec):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Mailer:
+    """
+    Sends batches of messages over a few long-lived, authenticated SMTP
+    connections, with rate limiting and retry/backoff per message.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 workers=2, rate_per_sec=5, max_retries=3, backoff=1.0, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_per_sec)
+
+    def send_many(self, messages):
+        """Send every message; returns (sent, failed) counts."""
+        pending = queue.Queue()
+        for msg in messages:
+            pending.put(msg)
+
+        results = {'sent': 0, 'failed': 0}
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self._worker, args=(pending, results, lock), daemon=True)
+            for _ in range(min(self.workers, pending.qsize()))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        logging.info(f"Mailer sent {results['sent']} messages, {results['failed']} failed.")
+        return results['sent'], results['failed']
+
+    def send(self, msg):
+        return self.send_many([msg])[0] == 1
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()  # Upgrade to a secure connection
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def _worker(self, pending, results, lock):
+        server = None
+        try:
+            while True:
+                try:
+                    msg = pending.get_nowait()
+                except queue.Empty:
+                    break
+
+                sent = False
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        if server is None:
+                            server = self._connect()
+                        self.limiter.wait()
+                        server.send_message(msg)
+                        sent = True
+                        break
+                    except smtplib.SMTPRecipientsRefused as e:
+                        logging.error(f"Recipient refused for {msg['To']}: {e}")
+                        break  # Retrying will not help
+                    except (smtplib.SMTPException, OSError) as e:
+                        logging.warning(f"Send to {msg['To']} failed (attempt {attempt + 1}): {e}")
+                        server = self._close(server)
+                        if attempt < self.max_retries:
+                            time.sleep(self.backoff * 2 ** attempt)
+
+                with lock:
+                    results['sent' if sent else 'failed'] += 1
+                if sent:
+                    logging.info(f"Email sent successfully to {msg['To']}.")
+                else:
+                    logging.error(f"Failed to send email to {msg['To']}.")
+        finally:
+            self._close(server)
+
+    def _close(self, server):
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        return None
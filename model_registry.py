@@ -0,0 +1,315 @@
+# model_registry.py
+#
+# Versioned price-model artifacts plus a manifest naming the active version
+# and an optional candidate that gets a share of the traffic. Workers re-read
+# the manifest when it changes, so a model is rolled forward (or back) by
+# editing the manifest, without restarting the app:
+#
+#   python model_registry.py list
+#   python model_registry.py activate v3
+#   python model_registry.py split v4 0.1     # send 10% of predictions to v4
+#   python model_registry.py split v4 0       # stop the experiment
+
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from predictor import PricePredictionModel
+
+MODEL_DIR = os.environ.get(
+    'TRACKIT_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+)
+MANIFEST = 'manifest.json'
+MODEL_KEEP = 5  # Newest versions kept on disk, besides the active and candidate ones
+
+
+class ModelRegistry:
+    """
+    Serves predictions from the active model version, or from the candidate
+    for a `split` fraction of keys, and records per-version latency and
+    prediction metrics. Artifacts are loaded once per version and cached
+    until the version leaves the manifest.
+    """
+
+    def __init__(self, directory=MODEL_DIR, reload_interval=1.0, latency_samples=1000, keep=MODEL_KEEP):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.latency_samples = latency_samples
+        self.keep = keep
+        self._manifest = {'active': None, 'candidate': None, 'split': 0.0, 'versions': {}}
+        self._mtime = None
+        self._checked = 0.0
+        self._models = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    # Manifest
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST)
+
+    def manifest(self):
+        """Current manifest, re-read from disk at most every reload_interval seconds."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked >= self.reload_interval:
+                self._checked = now
+                self._reload()
+            return json.loads(json.dumps(self._manifest))
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+            if mtime == self._mtime:
+                return
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            if self._mtime is not None:
+                logging.error(f"Could not read model manifest {self.manifest_path}: {e}")
+            return
+        if manifest.get('active') != self._manifest.get('active') or manifest.get('candidate') != self._manifest.get('candidate'):
+            logging.info(f"Model manifest changed: active={manifest.get('active')}, "
+                         f"candidate={manifest.get('candidate')} ({manifest.get('split', 0.0)})")
+        self._manifest = manifest
+        self._mtime = mtime
+        # Versions pruned by publish() (in any process) are not served again
+        for version in set(self._models) - set(manifest.get('versions', {})):
+            del self._models[version]
+            self._metrics.pop(version, None)
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)  # Workers never read a half-written manifest
+        with self._lock:
+            self._checked = 0.0
+
+    def _update_manifest(self, **changes):
+        with self._lock:
+            self._checked = 0.0  # Start from what is on disk now
+        manifest = self.manifest()
+        manifest.update(changes)
+        self._write_manifest(manifest)
+        return manifest
+
+    # Publishing and rollout
+
+    def artifact_path(self, version):
+        return os.path.join(self.directory, f"price_model-{version}.joblib")
+
+    def publish(self, model, data_version, activate=False):
+        """
+        Save a trained model as a new version; returns the version name.
+        While a candidate has a traffic split the active version is left
+        alone, so an experiment is not cut short by a routine retrain. Older
+        versions beyond `keep` are removed (see _prune).
+        """
+        manifest = self.manifest()
+        version = f"v{max((int(v[1:]) for v in manifest['versions']), default=0) + 1}"
+        while os.path.exists(self.artifact_path(version)):
+            version = f"v{int(version[1:]) + 1}"
+        model.save(self.artifact_path(version), data_version)
+
+        manifest['versions'][version] = {
+            'data_version': data_version,
+            'trained_at': model.trained_at,
+            'score': getattr(model, 'score', None),
+        }
+        experiment = manifest.get('candidate') and manifest.get('split', 0.0) > 0
+        if activate and experiment:
+            logging.info(f"Not activating {version} while {manifest['candidate']} has a traffic split.")
+        elif activate or manifest['active'] is None:
+            manifest['active'] = version
+        removed = self._prune(manifest)
+        self._write_manifest(manifest)
+        for old in removed:
+            try:
+                os.remove(self.artifact_path(old))
+            except FileNotFoundError:
+                pass
+        logging.info(f"Published price model {version}{' (active)' if manifest['active'] == version else ''}"
+                     f"{f', removed {len(removed)} old versions' if removed else ''}.")
+        return version
+
+    def _prune(self, manifest):
+        """Drop all but the newest `keep` versions from the manifest, never the active or candidate one."""
+        newest_first = sorted(manifest['versions'], key=lambda v: int(v[1:]), reverse=True)
+        kept = set(newest_first[:self.keep]) | {manifest.get('active'), manifest.get('candidate')}
+        removed = [version for version in newest_first if version not in kept]
+        for version in removed:
+            del manifest['versions'][version]
+        return removed
+
+    def activate(self, version):
+        """Make `version` serve all traffic and end any experiment."""
+        self._require(version)
+        return self._update_manifest(active=version, candidate=None, split=0.0)
+
+    def split(self, version, fraction):
+        """Send `fraction` of predictions to `version`; 0 ends the experiment."""
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError("split must be between 0 and 1")
+        if fraction == 0:
+            return self._update_manifest(candidate=None, split=0.0)
+        self._require(version)
+        return self._update_manifest(candidate=version, split=fraction)
+
+    def latest(self):
+        """Manifest entry ({data_version, trained_at, score}) of the newest version, or None."""
+        versions = self.manifest()['versions']
+        if not versions:
+            return None
+        return versions[max(versions, key=lambda v: int(v[1:]))]
+
+    def latest_data_version(self):
+        latest = self.latest()
+        return latest['data_version'] if latest else None
+
+    def _require(self, version):
+        if version not in self.manifest()['versions']:
+            raise KeyError(f"Unknown model version {version}")
+
+    # Serving
+
+    def _model(self, version):
+        with self._lock:
+            model = self._models.get(version)
+        if model is None:
+            model = PricePredictionModel.load(self.artifact_path(version))
+            with self._lock:
+                self._models[version] = model
+        return model
+
+    def choose(self, key=None, manifest=None):
+        """
+        Version to serve. With a key (e.g. the product id) the choice is
+        stable, so the same product always sees the same model.
+        """
+        manifest = manifest or self.manifest()
+        candidate, split = manifest.get('candidate'), manifest.get('split', 0.0)
+        if candidate and split > 0:
+            draw = zlib.crc32(str(key).encode()) / 0xFFFFFFFF if key is not None else random.random()
+            if draw < split:
+                return candidate
+        return manifest.get('active')
+
+    def get(self, key=None):
+        """(version, model) to serve, or (None, None) before anything is published."""
+        version = self.choose(key)
+        if version is None:
+            return None, None
+        try:
+            return version, self._model(version)
+        except Exception as e:
+            logging.error(f"Failed to load price model {version}: {e}")
+            return version, None
+
+    def predict(self, input_data, key=None):
+        """Returns (prediction, version); prediction is None if no model could answer."""
+        version, model = self.get(key)
+        if model is None:
+            return None, version
+        started = time.perf_counter()
+        prediction = model.predict(input_data)
+        self._record(version, time.perf_counter() - started, [prediction])
+        return prediction, version
+
+    def predict_many(self, features, keys=None):
+        """
+        Score a whole frame (index = product ids, FEATURES columns) with one
+        predict_many call per serving version. Products are routed like
+        predict(key=product id) unless `keys` is given. Returns a Series of
+        predictions and a Series of versions, both indexed like `features`.
+        """
+        keys = features.index if keys is None else keys
+        manifest = self.manifest()
+        versions = pd.Series([self.choose(key, manifest) for key in keys], index=features.index, dtype=object)
+        predictions = pd.Series(np.nan, index=features.index)
+        for version, index in versions.groupby(versions).groups.items():
+            try:
+                model = self._model(version)
+            except Exception as e:
+                logging.error(f"Failed to load price model {version}: {e}")
+                continue
+            started = time.perf_counter()
+            scores = model.predict_many(features.loc[index])
+            predictions.loc[index] = scores
+            self._record(version, time.perf_counter() - started, scores)
+        return predictions, versions
+
+    def _record(self, version, seconds, predictions):
+        # One latency sample per call, whatever its batch size
+        with self._lock:
+            metrics = self._metrics.setdefault(version, {
+                'predictions': 0, 'errors': 0, 'total': 0.0,
+                'latencies': deque(maxlen=self.latency_samples),
+            })
+            metrics['latencies'].append(seconds)
+            for prediction in predictions:
+                if prediction is None:
+                    metrics['errors'] += 1
+                else:
+                    metrics['predictions'] += 1
+                    metrics['total'] += float(prediction)
+
+    def metrics(self):
+        """Per-version role, training score and live prediction metrics for this process."""
+        manifest = self.manifest()
+        split = manifest.get('split', 0.0) if manifest.get('candidate') else 0.0
+        traffic = {'active': 1 - split, 'candidate': split}
+        with self._lock:
+            result = {}
+            for version, info in manifest['versions'].items():
+                metrics = self._metrics.get(version)
+                latencies = sorted(metrics['latencies']) if metrics else []
+                role = 'active' if version == manifest.get('active') else (
+                    'candidate' if version == manifest.get('candidate') else 'inactive')
+                result[version] = {
+                    **info,
+                    'role': role,
+                    'traffic': traffic.get(role, 0.0),
+                    'predictions': metrics['predictions'] if metrics else 0,
+                    'errors': metrics['errors'] if metrics else 0,
+                    'mean_prediction': round(metrics['total'] / metrics['predictions'], 2)
+                    if metrics and metrics['predictions'] else None,
+                    'latency_ms_p50': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+                    'latency_ms_p95': round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+                }
+            return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and roll out price model versions.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list')
+    activate = commands.add_parser('activate')
+    activate.add_argument('version')
+    split = commands.add_parser('split')
+    split.add_argument('version')
+    split.add_argument('fraction', type=float)
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry()
+    if args.command == 'activate':
+        registry.activate(args.version)
+    elif args.command == 'split':
+        registry.split(args.version, args.fraction)
+    print(json.dumps(registry.manifest(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
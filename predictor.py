@@ -1,3 +1,8 @@
+import os
+import re
+from datetime import datetime
+
+import joblib
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
@@ -5,45 +10,101 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import logging
 
+FEATURES = ['price_std', 'price_change']
+TARGET = 'price_drop_prob'
+DATE_COLUMN_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+CURRENCY_PREFIX = '₹Rs. '  # Characters stripped from the front of scraped price text
+PRICE_WHITESPACE = ' \t\r\n\xa0'  # Removed anywhere in scraped price text ('₹\n1,299 ')
+
+
+def date_columns(frame):
+    """All per-day price columns (YYYY-MM-DD), whatever the year."""
+    return [col for col in frame.columns if DATE_COLUMN_RE.match(str(col))]
+
+
+def clean_prices(prices):
+    """
+    Parses a frame of prices to floats. Numeric columns are used as they
+    are. Text cells (like '₹1,299') are hashed in one pass and only the
+    distinct strings are parsed, with NumPy string ops. A product's price
+    repeats for days, so there are far fewer of those than cells.
+    Non-positive and unparseable values become NaN.
+    """
+    text = np.array([not pd.api.types.is_numeric_dtype(dtype) for dtype in prices.dtypes], dtype=bool)
+    values = np.empty(prices.shape)
+    if (~text).any():
+        values[:, ~text] = prices.iloc[:, ~text].to_numpy(dtype=float, na_value=np.nan)
+    if text.any():
+        raw = prices.iloc[:, text].to_numpy(dtype=object)
+        codes, distinct = pd.factorize(raw.ravel())
+        parsed = np.full(len(distinct) + 1, np.nan)  # The last slot serves missing cells (code -1)
+        if len(distinct):
+            distinct = np.asarray(distinct, dtype=str)
+            for space in PRICE_WHITESPACE:
+                distinct = np.char.replace(distinct, space, '')
+            distinct = np.char.replace(np.char.lstrip(distinct, CURRENCY_PREFIX), ',', '')
+            # Plain decimals only; 'N/A' and empty strings become NaN
+            valid = np.char.isdecimal(np.char.replace(distinct, '.', '', 1))
+            parsed[:-1] = np.where(valid, distinct, 'nan').astype(float)
+        values[:, text] = parsed[codes].reshape(raw.shape)
+    values[~(values > 0)] = np.nan
+    return pd.DataFrame(values, index=prices.index, columns=prices.columns)
+
+
+def price_drop_target(price_change):
+    """Training target: the price change as a percentage when above 5%, else 0."""
+    return np.where(price_change > 0.05, price_change * 100, 0)
+
+
+def price_features(prices):
+    """
+    avg_price and the model features for a products x days frame of prices
+    (rupees, NaN where missing), as NumPy reductions over all rows at once.
+    Rows with fewer than two valid prices are dropped.
+    """
+    values = prices.to_numpy(dtype=float, na_value=np.nan, copy=True)
+    values[~(values > 0)] = np.nan
+    keep = np.count_nonzero(~np.isnan(values), axis=1) >= 2
+    values = values[keep]
+    if not len(values):
+        return pd.DataFrame(columns=['avg_price'] + FEATURES, index=prices.index[keep], dtype=float)
+
+    high = np.nanmax(values, axis=1)
+    low = np.nanmin(values, axis=1)
+    return pd.DataFrame({
+        'avg_price': np.nanmean(values, axis=1),
+        'price_std': np.nanstd(values, axis=1, ddof=1),
+        'price_change': (high - low) / high,
+    }, index=prices.index[keep])
+
 
 class PricePredictionModel:
     def __init__(self, dataset):
         self.dataset = dataset
         self.model = None
         self.scaler = None
+        self.data_version = None  # Fingerprint of the training data (see training.py)
+        self.trained_at = None
+        self.score = None         # R^2 on the held-out split
 
     def preprocess_data(self):
         """Preprocess data: clean prices and create features."""
         try:
-            # Clean prices in all columns except the first two (name, link)
-            price_columns = [col for col in self.dataset.columns if col.startswith("2024-")]
-            
-            def clean_price(price):
-                if isinstance(price, str):
-                    price = price.replace('₹', '').replace(',', '').strip()
-                try:
-                    return float(price) if float(price) > 0 else None
-                except ValueError:
-                    return None
-            
-            self.dataset[price_columns] = self.dataset[price_columns].map(clean_price)
+            # Every YYYY-MM-DD column is a day of prices, whatever the year
+            price_columns = date_columns(self.dataset)
+            prices = clean_prices(self.dataset[price_columns])
 
-            # Drop rows with insufficient price data
-            self.dataset.dropna(subset=price_columns, thresh=2, inplace=True)
+            # Calculate price trends; rows with fewer than two prices are dropped
+            features = price_features(prices)
+            kept = prices.index.isin(features.index)
+            self.dataset = pd.concat([
+                self.dataset.loc[kept, self.dataset.columns.difference(price_columns, sort=False)],
+                prices[kept],
+                features,
+            ], axis=1)
 
-            # Calculate price trends
-            self.dataset['avg_price'] = self.dataset[price_columns].mean(axis=1)
-            self.dataset['price_std'] = self.dataset[price_columns].std(axis=1)
-            self.dataset['price_change'] = self.dataset[price_columns].apply(
-                lambda row: (row.max() - row.min()) / row.max() if row.max() else 0, axis=1
-            )
-            
             # Calculate price drop probability
-            self.dataset['price_drop_prob'] = np.where(
-                self.dataset['price_change'] > 0.05,  # More than 5% price change
-                self.dataset['price_change'] * 100,   # Convert to percentage
-                0  # No significant price change
-            )
+            self.dataset[TARGET] = price_drop_target(self.dataset['price_change'])
             
             # Drop rows with invalid trends
             self.dataset.dropna(subset=['price_std', 'price_change'], inplace=True)
@@ -54,11 +115,11 @@ class PricePredictionModel:
             logging.error(f"Error during data preprocessing: {e}")
             raise
 
-    def train_model(self, target_column="price_drop_prob"):
+    def train_model(self, target_column=TARGET):
         """Train a model to predict price drop probability."""
         try:
             # Features and target
-            X = self.dataset[['price_std', 'price_change']]
+            X = self.dataset[FEATURES]
             y = self.dataset[target_column]
 
             # Split data
@@ -73,6 +134,7 @@ class PricePredictionModel:
             self.model = RandomForestRegressor(random_state=42)
             self.model.fit(X_train, y_train)
             score = self.model.score(X_test, y_test)
+            self.score = round(float(score), 4)
 
             logging.info(f"Model trained successfully with R^2 score: {score}")
         except Exception as e:
@@ -82,22 +144,56 @@ class PricePredictionModel:
     def predict(self, input_data):
         """Predict price drop probability based on input features."""
         try:
-            # Ensure input is a valid list or numpy array
-            input_features = np.array(input_data).reshape(1, -1)
-            
-            # Transform input features
-            input_scaled = self.scaler.transform(input_features)
-            
-            # Predict probability of price drop
-            prediction = self.model.predict(input_scaled)[0]
-            
-            # Clip prediction between 0 and 100
-            prediction = max(0, min(int(prediction), 100))
-            
-            return prediction
+            return int(self.predict_many([input_data])[0])
         except Exception as e:
             logging.error(f"Error during prediction: {e}")
             return None
+
+    def predict_many(self, features):
+        """
+        Predict drop probabilities for many products in one scaler/model call.
+        `features` is an N x F array or a frame with the FEATURES columns (e.g.
+        from price_features or preprocess_data). Returns N ints in 0..100.
+        """
+        if isinstance(features, pd.DataFrame):
+            X = features[FEATURES]
+        else:
+            X = pd.DataFrame(np.asarray(features, dtype=float).reshape(-1, len(FEATURES)), columns=FEATURES)
+        if X.empty:
+            return np.empty(0, dtype=int)
+
+        predictions = self.model.predict(self.scaler.transform(X))
+        # Truncate like int() and clip to a percentage
+        return np.clip(predictions.astype(int), 0, 100)
+
+    def save(self, path, data_version):
+        """Write the fitted scaler and model to a joblib artifact, atomically."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.data_version = data_version
+        self.trained_at = datetime.now().isoformat(timespec='seconds')
+        tmp_path = f"{path}.tmp"
+        joblib.dump({
+            'model': self.model,
+            'scaler': self.scaler,
+            'data_version': data_version,
+            'trained_at': self.trained_at,
+            'score': self.score,
+        }, tmp_path)
+        os.replace(tmp_path, path)  # Readers never see a half-written file
+        logging.info(f"Saved price model to {path} (data version {data_version}).")
+
+    @classmethod
+    def load(cls, path):
+        """Load a trained artifact; the instance has no dataset and is only for predict()."""
+        artifact = joblib.load(path)
+        instance = cls(dataset=None)
+        instance.model = artifact['model']
+        instance.scaler = artifact['scaler']
+        instance.data_version = artifact['data_version']
+        instance.trained_at = artifact['trained_at']
+        instance.score = artifact.get('score')
+        return instance
+
 # Commit on 2024-12-13T10:16:00+05:30
 # Commit on 2024-12-13T09:03:00+05:30
 # Commit on 2024-12-13T19:55:00+05:30
@@ -0,0 +1,117 @@
+# readiness.py
+
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+POLL_INTERVAL = 0.1  # Seconds between DOM checks
+
+# Resources a scraper never needs; blocked through the DevTools protocol
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm',
+]
+# Chrome content settings: 2 = block
+BLOCKING_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.stylesheets': 2,
+}
+
+
+def lighten_options(options):
+    """Stop Chrome from loading images, CSS and fonts, and return from get() at DOMContentLoaded."""
+    options.add_experimental_option('prefs', BLOCKING_PREFS)
+    options.page_load_strategy = 'eager'
+    return options
+
+
+def block_resources(driver):
+    """Request-level blocking for what the prefs miss (web fonts, CSS loaded by scripts)."""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+    except WebDriverException:
+        pass  # Not a Chromium driver; prefs alone still apply
+
+
+def wait_for_any(driver, locators, timeout):
+    """
+    Wait until any of `locators` matches (first-of) and return (locator,
+    element). All candidates are checked on every poll, so an alternative
+    selector never waits behind one that is missing. Raises TimeoutException.
+    """
+    def first_present(driver):
+        for locator in locators:
+            elements = driver.find_elements(*locator)
+            if elements:
+                return locator, elements[0]
+        return False
+
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+        first_present, f"None of {locators} appeared within {timeout}s"
+    )
+
+
+def dismiss_if_present(driver, locator):
+    """Click an overlay's close button if it is already on the page; never waits."""
+    elements = driver.find_elements(*locator)
+    if not elements:
+        return False
+    try:
+        elements[0].click()
+    except WebDriverException:
+        driver.execute_script("arguments[0].click();", elements[0])
+    return True
+
+
+class PageTimings:
+    """Per-platform histograms of browser page times, plus recent samples for percentiles."""
+
+    BUCKETS = [0.5, 1, 2, 3, 5, 8, 13, 21, 34]  # Upper bounds, seconds
+
+    def __init__(self, samples=1000):
+        self._counts = {}
+        self._samples = {}
+        self._max_samples = samples
+        self._lock = threading.Lock()
+
+    def record(self, platform, seconds):
+        with self._lock:
+            counts = self._counts.setdefault(platform, [0] * (len(self.BUCKETS) + 1))
+            counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+            self._samples.setdefault(platform, deque(maxlen=self._max_samples)).append(seconds)
+
+    def timed(self, platform):
+        """Decorator recording how long each call takes under `platform`."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(platform, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for platform, counts in self._counts.items():
+                samples = sorted(self._samples[platform])
+                labels = [f"<={bound}s" for bound in self.BUCKETS] + [f">{self.BUCKETS[-1]}s"]
+                result[platform] = {
+                    'count': sum(counts),
+                    'p50': round(samples[len(samples) // 2], 2),
+                    'p90': round(samples[int(len(samples) * 0.9)], 2),
+                    'max': round(samples[-1], 2),
+                    'histogram': dict(zip(labels, counts)),
+                }
+            return result
+
@@ -0,0 +1,205 @@
+# scheduler.py
+#
+# Long-running refresh daemon: `python scheduler.py [--budget PAGES_PER_HOUR]`.
+# Instead of refreshing every product on every run, each product is put in a
+# tier from its watcher count, recent price volatility and the time since its
+# price last changed, and only products whose tier interval has passed are
+# refreshed, highest tier first, within a pages-per-hour budget.
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from functions import (PLATFORM_TABLES, REFRESH_SCRAPERS, get_price_history_db_connection,
+                       get_users_db_connection, refresh_table, refresh_reliance_matches, send_alert_mail)
+from training import precompute_predictions, retrain_if_changed
+
+# (tier, refresh interval in seconds), most urgent first
+TIERS = [
+    ('hot', 60 * 60),
+    ('warm', 6 * 60 * 60),
+    ('daily', 24 * 60 * 60),
+    ('dormant', 7 * 24 * 60 * 60),
+]
+TIER_INTERVALS = dict(TIERS)
+TIER_RANK = {tier: rank for rank, (tier, _) in enumerate(TIERS)}
+
+PAGES_PER_HOUR = int(os.environ.get('TRACKIT_PAGES_PER_HOUR', 600))
+CYCLE_SECONDS = 10 * 60          # How often the daemon plans a batch
+HISTORY_DAYS = 30                # Window used for volatility and last change
+VOLATILE_CV = 0.02               # Std/mean of the price above which a product is volatile
+RECENT_CHANGE_DAYS = 3           # A change this recent makes a product hot (if watched) or warm
+ACTIVE_DAYS = 30                 # Unwatched products unchanged this long go dormant
+RELIANCE_INTERVAL = 24 * 60 * 60
+
+
+def assign_tier(watchers, volatility, days_since_change):
+    """Pick a refresh tier; days_since_change is None when nothing is known yet."""
+    recently_changed = days_since_change is not None and days_since_change <= RECENT_CHANGE_DAYS
+    if watchers and (volatility >= VOLATILE_CV or recently_changed):
+        return 'hot'
+    if watchers or recently_changed:
+        return 'warm'
+    if days_since_change is None or days_since_change < ACTIVE_DAYS:
+        return 'daily'
+    return 'dormant'
+
+
+def watcher_counts():
+    """{(platform, product_id): number of users watching it}."""
+    conn = get_users_db_connection()
+    try:
+        rows = conn.execute("SELECT platform, product_id, COUNT(*) FROM watch GROUP BY platform, product_id").fetchall()
+    finally:
+        conn.close()
+    return {(platform, product_id): count for platform, product_id, count in rows}
+
+
+def price_signals(platform, now):
+    """
+    Per product: last refresh attempt, volatility (coefficient of variation)
+    and days since the price last changed, from the last HISTORY_DAYS of
+    observations. Failed attempts (PRICE_FAILED) count as refreshes, so a
+    dead link waits out its tier interval like any other product. Products
+    never attempted are absent.
+    """
+    since = (now - timedelta(days=HISTORY_DAYS)).isoformat(timespec='seconds')
+    conn = get_price_history_db_connection()
+    try:
+        obs = pd.read_sql_query('''
+            SELECT product_id, observed_at, price_paise FROM price_observation
+            WHERE platform = ? AND observed_at >= ?
+            ORDER BY product_id, observed_at
+        ''', conn, params=[platform, since])
+        seen = conn.execute('''
+            SELECT product_id, MIN(observed_at), MAX(observed_at) FROM price_observation
+            WHERE platform = ? GROUP BY product_id
+        ''', (platform,)).fetchall()
+    finally:
+        conn.close()
+
+    obs['observed_at'] = pd.to_datetime(obs['observed_at'])
+    prices = obs.dropna(subset=['price_paise'])
+    grouped = prices.groupby('product_id')['price_paise']
+    volatility = (grouped.std(ddof=0) / grouped.mean()).fillna(0.0)
+
+    changed = prices['price_paise'].ne(grouped.shift()) & grouped.shift().notna()
+    last_change = prices[changed].groupby('product_id')['observed_at'].max()
+    days_since_change = (pd.Timestamp(now) - last_change).dt.total_seconds() / 86400
+
+    signals = {}
+    for product_id, first_seen, last_seen in seen:
+        if product_id in days_since_change:
+            stable_days = float(days_since_change[product_id])
+        else:
+            # No change inside the window: stable since the first observation, or longer than the window
+            stable_days = min((now - datetime.fromisoformat(first_seen)).total_seconds() / 86400, HISTORY_DAYS)
+        signals[product_id] = {
+            'last_refresh': datetime.fromisoformat(last_seen),
+            'volatility': float(volatility.get(product_id, 0.0)),
+            'days_since_change': stable_days,
+        }
+    return signals
+
+
+def plan(budget, now=None):
+    """
+    Returns (due, demand): the products to refresh now as a list of
+    (platform, srno, tier), at most `budget` of them, most urgent first; and
+    the steady-state pages/hour all tiers need, to compare with the budget.
+    """
+    now = now or datetime.now()
+    watchers = watcher_counts()
+    candidates = []
+    demand = 0.0
+
+    for platform, table in PLATFORM_TABLES.items():
+        conn = get_price_history_db_connection()
+        try:
+            srnos = [row[0] for row in conn.execute(f"SELECT srno FROM {table}").fetchall()]
+        finally:
+            conn.close()
+        signals = price_signals(platform, now)
+
+        for srno in srnos:
+            signal = signals.get(srno)
+            if signal is None:
+                tier, overdue = 'daily', np.inf  # Never scraped: fetch soon
+            else:
+                tier = assign_tier(watchers.get((platform, srno), 0), signal['volatility'], signal['days_since_change'])
+                age = (now - signal['last_refresh']).total_seconds()
+                overdue = age / TIER_INTERVALS[tier]
+            demand += 3600 / TIER_INTERVALS[tier]
+            if overdue >= 1:
+                candidates.append((TIER_RANK[tier], -overdue, platform, srno, tier))
+
+    candidates.sort()
+    due = [(platform, srno, tier) for _, _, platform, srno, tier in candidates[:budget]]
+    return due, round(demand, 1)
+
+
+def run_cycle(pages_per_hour=PAGES_PER_HOUR, cycle_seconds=CYCLE_SECONDS, workers=None):
+    """Refresh one cycle's share of the budget; returns the per-table stats."""
+    budget = max(1, int(pages_per_hour * cycle_seconds / 3600))
+    due, demand = plan(budget)
+    if demand > pages_per_hour:
+        logging.warning(f"Tiers need {demand} pages/hour but the budget is {pages_per_hour}; "
+                        f"low tiers will be refreshed late.")
+
+    by_platform = {}
+    for platform, srno, _ in due:
+        by_platform.setdefault(platform, []).append(srno)
+    tiers = pd.Series([tier for _, _, tier in due], dtype=object).value_counts().to_dict()
+    logging.info(f"Refreshing {len(due)} of budget {budget} pages: {tiers}")
+
+    with ThreadPoolExecutor(max_workers=max(1, len(by_platform))) as executor:
+        futures = [
+            executor.submit(refresh_table, PLATFORM_TABLES[platform], REFRESH_SCRAPERS[platform], workers, srnos)
+            for platform, srnos in by_platform.items()
+        ]
+        runs = [future.result() for future in futures]
+
+    if runs:
+        send_alert_mail()
+    return runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh tracked prices continuously, by priority tier.")
+    parser.add_argument('--budget', type=int, default=PAGES_PER_HOUR, help="pages per hour across all platforms")
+    parser.add_argument('--cycle', type=int, default=CYCLE_SECONDS, help="seconds between planning rounds")
+    parser.add_argument('--workers', type=int, default=None, help="browser scrapes in flight per table")
+    parser.add_argument('--once', action='store_true', help="run a single cycle and exit")
+    args = parser.parse_args(argv)
+
+    last_reliance = 0.0
+    while True:
+        started = time.monotonic()
+        try:
+            for run in run_cycle(args.budget, args.cycle, args.workers):
+                logging.info(f"Scheduler refreshed {run}")
+            if time.time() - last_reliance >= RELIANCE_INTERVAL:
+                refresh_reliance_matches(args.workers)
+                last_reliance = time.time()
+            # Retrains at most daily unless the price history grew a lot (see training.py)
+            retrain_if_changed()
+            precompute_predictions()
+        except Exception as e:
+            logging.error(f"Scheduler cycle failed: {e}")
+
+        if args.once:
+            break
+        time.sleep(max(0.0, args.cycle - (time.monotonic() - started)))
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("Scheduler stopped.")
@@ -0,0 +1,101 @@
+# selector_registry.py
+
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'selectors.json')
+
+
+def is_xpath(selector):
+    return selector.startswith('/') or selector.startswith('(')
+
+
+class SelectorRegistry:
+    """
+    Ordered fallback selectors per platform and field, read from a JSON file
+    that is reloaded when it changes on disk. Every lookup is recorded so the
+    selectors that match most often are tried first; a selector that has not
+    matched once in `dead_after` tries is flagged dead and tried last.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, reload_interval=1.0, dead_after=20):
+        self.path = path
+        self.reload_interval = reload_interval  # Seconds between mtime checks
+        self.dead_after = dead_after
+        self._config = {}
+        self._mtime = None
+        self._checked = 0.0
+        self._counts = {}  # (platform, field, selector) -> [tries, hits]
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding='utf-8') as f:
+                config = json.load(f)
+            if not all(isinstance(fields, dict) and all(isinstance(s, list) for s in fields.values())
+                       for fields in config.values()):
+                raise ValueError("expected {platform: {field: [selectors]}}")
+        except (OSError, ValueError) as e:
+            # Keep serving the last good registry rather than breaking every scraper
+            logging.error(f"Could not load selectors from {self.path}: {e}")
+            return
+        self._config = config
+        self._mtime = mtime
+        logging.info(f"Loaded selectors from {self.path}")
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked >= self.reload_interval:
+            self._checked = now
+            self._reload()
+
+    def selectors(self, platform, field):
+        """Configured selectors for the field, best hit rate first, dead ones last."""
+        with self._lock:
+            self._maybe_reload()
+            configured = self._config.get(platform, {}).get(field, [])
+
+            def rank(item):
+                position, selector = item
+                tries, hits = self._counts.get((platform, field, selector), (0, 0))
+                dead = hits == 0 and tries >= self.dead_after
+                return dead, -(hits + 1) / (tries + 2), position
+
+            return [selector for _, selector in sorted(enumerate(configured), key=rank)]
+
+    def record(self, platform, field, selector, hit):
+        with self._lock:
+            counts = self._counts.setdefault((platform, field, selector), [0, 0])
+            counts[0] += 1
+            counts[1] += bool(hit)
+            if counts[0] == self.dead_after and counts[1] == 0:
+                logging.warning(f"Selector {selector!r} for {platform}.{field} has never matched; flagged dead.")
+
+    def stats(self):
+        """Per-selector tries, hits, hit rate and dead flag for the current registry."""
+        with self._lock:
+            result = {}
+            for platform, fields in self._config.items():
+                for field, configured in fields.items():
+                    rows = []
+                    for selector in configured:
+                        tries, hits = self._counts.get((platform, field, selector), (0, 0))
+                        rows.append({
+                            'selector': selector,
+                            'tries': tries,
+                            'hits': hits,
+                            'hit_rate': round(hits / tries, 3) if tries else None,
+                            'dead': hits == 0 and tries >= self.dead_after,
+                        })
+                    result.setdefault(platform, {})[field] = rows
+            return result
+
+
+registry = SelectorRegistry(os.environ.get('TRACKIT_SELECTORS', DEFAULT_PATH))
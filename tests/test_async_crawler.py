@@ -0,0 +1,131 @@
+import asyncio
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from async_crawler import AsyncCrawler, crawl_products
+from http_fetch import PARSERS
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+class ProductPages(BaseHTTPRequestHandler):
+    """
+    Serves saved product pages. /flaky/<n>/... answers 503 for the first n
+    requests, /down always answers 503 and unknown paths 404.
+    """
+
+    routes = {
+        '/amazon/echo-dot': 'amazon_product.html',
+        '/flipkart/echo-dot': 'flipkart_product.html',
+    }
+    hits = Counter()
+
+    def do_GET(self):
+        self.hits[self.path] += 1
+        path = urlsplit(self.path).path
+        if path.startswith('/flaky/'):
+            _, _, failures, path = path.split('/', 3)
+            path = '/' + path
+            if self.hits[self.path] <= int(failures):
+                return self._respond(503, b'Service Unavailable')
+        if path == '/down':
+            return self._respond(503, b'Service Unavailable')
+        if path == '/captcha':
+            return self._respond(200, b'<html><body><form action="/errors/validateCaptcha"></form></body></html>')
+        if path not in self.routes:
+            return self._respond(404, b'Not Found')
+        self._respond(200, fixture(self.routes[path]))
+
+    def _respond(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ProductPages.hits = Counter()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), ProductPages)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def crawl(urls, platform='amazon', **options):
+    options.setdefault('backoff', 0.01)
+    return asyncio.run(AsyncCrawler(**options).crawl(urls, PARSERS[platform]))
+
+
+def test_crawl_parses_saved_amazon_page(server):
+    url = f"{server}/amazon/echo-dot"
+    result = crawl([url])[url]
+
+    assert result['name'] == 'Echo Dot (5th Gen) | Smart speaker with Alexa'
+    assert result['price'] == '₹4,499.00'
+    assert result['image'] == 'https://m.media-amazon.com/images/I/echo-dot.jpg'
+    assert result['star_rating'] == '4.4 out of 5 stars'
+    assert result['reviews'] == '12,345 ratings'
+    assert result['availability'] == 'In stock'
+    assert result['link'] == url
+
+
+def test_crawl_products_uses_platform_parser(server):
+    url = f"{server}/flipkart/echo-dot"
+    result = crawl_products('flipkart', [url], backoff=0.01)[url]
+
+    assert result['name'] == 'Amazon Echo Dot (5th Gen) Smart Speaker'
+    assert result['price'] == '₹4,299'
+    assert result['star_rating'] == '4.3 out of 5 stars'
+    assert result['availability'] == 'In stock'
+
+
+def test_crawl_retries_5xx_until_success(server):
+    url = f"{server}/flaky/2/amazon/echo-dot"
+    result = crawl([url], retries=3)[url]
+
+    assert result['price'] == '₹4,499.00'
+    assert ProductPages.hits['/flaky/2/amazon/echo-dot'] == 3
+
+
+def test_crawl_gives_up_after_retries(server):
+    url = f"{server}/down"
+    assert crawl([url], retries=2) == {url: None}
+    assert ProductPages.hits['/down'] == 3
+
+
+def test_crawl_does_not_retry_client_errors(server):
+    url = f"{server}/amazon/no-such-product"
+    assert crawl([url], retries=3) == {url: None}
+    assert ProductPages.hits['/amazon/no-such-product'] == 1
+
+
+def test_crawl_returns_none_for_pages_without_a_price(server):
+    url = f"{server}/captcha"
+    assert crawl([url]) == {url: None}
+
+
+def test_crawl_many_urls_with_per_domain_limit(server):
+    urls = [f"{server}/amazon/echo-dot?ref={i}" for i in range(40)] + [f"{server}/flaky/1/amazon/echo-dot"]
+    results = crawl(urls, per_domain=4, retries=2)
+
+    assert len(results) == len(urls)
+    assert all(result and result['price'] == '₹4,499.00' for result in results.values())
@@ -0,0 +1,259 @@
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import functions
+import training
+from model_registry import ModelRegistry
+from predictor import FEATURES, TARGET, PricePredictionModel
+from selector_registry import SelectorRegistry
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    functions.init_price_store(conn)
+    yield conn
+    conn.close()
+
+
+def observations(conn, platform):
+    return conn.execute("SELECT COUNT(*) FROM price_observation WHERE platform = ?", (platform,)).fetchone()[0]
+
+
+def product(name, price, link):
+    return functions.product_record(name=name, price=price, link=link)
+
+
+# Response cache
+
+def test_cache_hits_are_flagged(monkeypatch):
+    scrapes = []
+
+    def fast_path(platform, url):
+        scrapes.append(url)
+        return product('Echo Dot', '₹4,499', url)
+
+    monkeypatch.setattr(functions, '_fast_path', fast_path)
+    monkeypatch.setattr(functions, 'response_cache', functions.TTLCache(max_entries=10))
+    url = 'https://www.amazon.in/dp/B09B8V1LZ3'
+
+    first = functions.scrape_amazon_product(url)
+    second = functions.scrape_amazon_product(url)
+
+    assert scrapes == [url]
+    assert 'cached' not in first
+    assert second['cached'] is True
+    assert second['price'] == first['price']
+
+
+def test_cached_flipkart_page_is_not_recorded_again(conn):
+    amazon_srno = functions.add_product(conn, 'amazon', 'Echo Dot', 'https://www.amazon.in/dp/1')
+    flipkart = product('Echo Dot Smart Speaker', '₹4,299', 'https://www.flipkart.com/p/1')
+
+    functions.save_product_match(conn, amazon_srno, 'Echo Dot', {'flipkart': flipkart, 'reliance': {}})
+    functions.save_product_match(conn, amazon_srno, 'Echo Dot', {'flipkart': {**flipkart, 'cached': True}, 'reliance': {}})
+
+    assert observations(conn, 'flipkart') == 1
+    assert conn.execute("SELECT n FROM price_feature WHERE platform = 'flipkart'").fetchone()[0] == 1
+
+
+# Browser selector fallbacks
+
+class FakeElement:
+    def __init__(self, text='', **attrs):
+        self.text = text
+        self.attrs = attrs
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+
+class FakeDriver:
+    """Answers find_elements from a {selector: [elements]} page and logs every lookup."""
+
+    def __init__(self, page):
+        self.page = page
+        self.lookups = []
+
+    def find_elements(self, by, selector):
+        self.lookups.append(selector)
+        return self.page.get(selector, [])
+
+
+@pytest.fixture
+def selectors(tmp_path, monkeypatch):
+    path = tmp_path / 'selectors.json'
+    path.write_text('{"shop": {"price": ["#deal", "#our", "#list"], "image": ["#main", "#alt"]}}', encoding='utf-8')
+    registry = SelectorRegistry(str(path), dead_after=3)
+    monkeypatch.setattr(functions, 'selector_registry', registry)
+    return registry
+
+
+def tries(registry, field='price'):
+    return {row['selector']: (row['tries'], row['hits']) for row in registry.stats()['shop'][field]}
+
+
+def test_browser_field_records_only_selectors_it_read(selectors):
+    driver = FakeDriver({'#deal': [FakeElement('₹4,499')], '#our': [FakeElement('₹4,999')]})
+
+    for _ in range(5):
+        assert functions._browser_field(driver, 'shop', 'price', timeout=1) == '₹4,499'
+
+    assert tries(selectors) == {'#deal': (5, 5), '#our': (0, 0), '#list': (0, 0)}
+    assert not any(row['dead'] for row in selectors.stats()['shop']['price'])
+
+
+def test_browser_field_skips_empty_matches(selectors):
+    driver = FakeDriver({'#deal': [FakeElement('  ')], '#our': [FakeElement('₹4,999')]})
+
+    assert functions._browser_field(driver, 'shop', 'price', timeout=1) == '₹4,999'
+    assert tries(selectors) == {'#deal': (1, 0), '#our': (1, 1), '#list': (0, 0)}
+
+
+def test_browser_field_reads_attributes(selectors):
+    driver = FakeDriver({'#main': [FakeElement()], '#alt': [FakeElement(src='https://img/1.jpg')]})
+
+    assert functions._browser_field(driver, 'shop', 'image', attr='src') == 'https://img/1.jpg'
+
+
+def test_browser_field_misses_every_selector_when_nothing_renders(selectors, monkeypatch):
+    def time_out(driver, locators, timeout):
+        raise functions.TimeoutException()
+
+    monkeypatch.setattr(functions, 'wait_for_any', time_out)
+    driver = FakeDriver({})
+
+    assert functions._browser_field(driver, 'shop', 'price', timeout=1) == 'N/A'
+    assert tries(selectors) == {'#deal': (1, 0), '#our': (1, 0), '#list': (1, 0)}
+
+
+# Reliance search failures trip the breaker
+
+class FakePool:
+    def __init__(self, driver):
+        self._driver = driver
+
+    @contextmanager
+    def driver(self):
+        yield self._driver
+
+
+class BrowserPage(FakeDriver):
+    def get(self, url):
+        self.url = url
+
+
+def test_reliance_search_without_results_trips_the_breaker(monkeypatch):
+    def time_out(driver, locators, timeout):
+        raise functions.TimeoutException()
+
+    monkeypatch.setattr(functions, 'driver_pool', FakePool(BrowserPage({})))
+    monkeypatch.setattr(functions, 'wait_for_any', time_out)
+    monkeypatch.setattr(functions.error_screenshots, 'capture', lambda driver, platform: None)
+    monkeypatch.setattr(functions, '_breakers', {})
+    url = functions.reliance_search_url('Echo Dot 5th Gen')
+
+    for _ in range(functions.BREAKER_THRESHOLD):
+        assert functions._guarded_scrape('reliance', functions._get_first_product_details_selenium, url) == {}
+
+    assert functions.breaker_stats()['reliance']['state'] == 'open'
+    with pytest.raises(functions.CircuitOpenError):
+        functions._guarded_scrape('reliance', functions._get_first_product_details_selenium, url)
+
+
+# Drop alerts start from existing history
+
+def test_migrated_history_is_not_reported_as_new_drops():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE amazon_data (srno INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, '
+                 'link TEXT NOT NULL UNIQUE, "2024-12-01" TEXT, "2025-01-05" TEXT)')
+    conn.execute("INSERT INTO amazon_data (name, link, \"2024-12-01\", \"2025-01-05\") VALUES ('Echo Dot', 'l1', '₹2,000', '₹1,500')")
+    conn.commit()
+
+    functions.migrate_wide_tables(conn)
+    assert functions.detect_new_price_drops('amazon', conn=conn) == []
+
+    functions.record_prices(conn, 'amazon', [(1, '₹1,200')], '2025-02-01T00:00:00')
+    conn.commit()
+    drops = functions.detect_new_price_drops('amazon', conn=conn)
+    conn.close()
+
+    assert [(d['previous_paise'], d['current_paise'], d['all_time_low']) for d in drops] == [(150000, 120000, True)]
+
+
+def test_alert_tables_created_late_are_seeded(conn):
+    srno = functions.add_product(conn, 'amazon', 'Echo Dot', 'https://www.amazon.in/dp/1')
+    functions.record_prices(conn, 'amazon', [(srno, '₹2,000')], '2025-01-01T00:00:00')
+    functions.record_prices(conn, 'amazon', [(srno, '₹1,500')], '2025-01-02T00:00:00')
+    conn.execute("DROP TABLE price_alert_state")
+    conn.execute("DROP TABLE price_alert_cursor")
+    functions.init_price_store(conn)
+
+    assert functions.detect_new_price_drops('amazon', conn=conn) == []
+
+
+# Cross-platform matches
+
+def test_mismatched_variant_is_searched_for_again(conn, monkeypatch):
+    name = 'Apple iPhone 15 Pro 256GB'
+    amazon_srno = functions.add_product(conn, 'amazon', name, 'https://www.amazon.in/dp/2')
+    flipkart = product('Apple iPhone 15 128GB', '₹69,999', 'https://www.flipkart.com/p/2')
+    functions.save_product_match(conn, amazon_srno, name, {'flipkart': flipkart, 'reliance': {}})
+
+    match = functions.get_product_match(conn, amazon_srno)
+    assert match['flipkart_confidence'] < functions.MATCH_MIN_CONFIDENCE
+
+    scraped = []
+    monkeypatch.setattr(functions, 'match_title', lambda platform, title: None)
+    monkeypatch.setattr(functions, 'find_flipkart_link', lambda title: 'https://www.flipkart.com/p/3')
+    monkeypatch.setattr(functions, 'scrape_flipkart_product', scraped.append)
+    functions._lookup_flipkart(name, match)
+
+    assert scraped == ['https://www.flipkart.com/p/3']
+
+
+# Nightly update
+
+def test_update_precomputes_drop_probabilities(tmp_path, monkeypatch):
+    path = tmp_path / 'prices.db'
+
+    def connect():
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    conn = connect()
+    functions.init_price_store(conn)
+    srno = functions.add_product(conn, 'amazon', 'Echo Dot', 'https://www.amazon.in/dp/1')
+    functions.record_prices(conn, 'amazon', [(srno, '₹2,000')], '2025-01-01T00:00:00')
+    functions.record_prices(conn, 'amazon', [(srno, '₹1,500')], '2025-01-02T00:00:00')
+    conn.commit()
+    conn.close()
+
+    dataset = pd.DataFrame(np.random.default_rng(0).random((20, len(FEATURES))), columns=FEATURES)
+    dataset[TARGET] = dataset['price_change'] * 100
+    model = PricePredictionModel(dataset)
+    model.train_model()
+    registry = ModelRegistry(str(tmp_path / 'models'), reload_interval=0)
+    registry.publish(model, 'd1', activate=True)
+
+    run = {'pages': 1, 'failed': 0, 'skipped': 0, 'seconds': 1.0}
+    monkeypatch.setattr(functions, 'update_table_values_amazon', lambda workers: run)
+    monkeypatch.setattr(functions, 'update_table_values_flipkart', lambda workers: run)
+    monkeypatch.setattr(functions, 'refresh_reliance_matches', lambda workers: {})
+    monkeypatch.setattr(functions, 'send_alert_mail', lambda: None)
+    monkeypatch.setattr(training, 'get_price_history_db_connection', connect)
+    monkeypatch.setattr(training, 'ModelRegistry', lambda: registry)
+
+    functions.update()
+
+    conn = connect()
+    rows = conn.execute("SELECT platform, product_id, model_version FROM price_prediction").fetchall()
+    conn.close()
+    assert [tuple(row) for row in rows] == [('amazon', srno, 'v1')]
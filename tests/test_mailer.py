@@ -0,0 +1,109 @@
+import socket
+from email.mime.text import MIMEText
+
+import pytest
+
+pytest.importorskip('aiosmtpd')
+from aiosmtpd.controller import Controller
+
+from mailer import Mailer
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """Collects delivered messages; can refuse recipients or fail the first DATA commands."""
+
+    def __init__(self, refuse=(), fail_first=0):
+        self.refuse = set(refuse)
+        self.fail_first = fail_first
+        self.rcpt_attempts = []
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        self.rcpt_attempts.append(address)
+        if address in self.refuse:
+            return '550 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_first:
+            self.fail_first -= 1
+            return '451 Try again later'
+        self.delivered.append((envelope.rcpt_tos[0], envelope.content.decode()))
+        return '250 Message accepted'
+
+
+@pytest.fixture
+def smtp_server():
+    servers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+        controller.start()
+        servers.append(controller)
+        return controller
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+def message(to):
+    msg = MIMEText(f"Hello {to}")
+    msg['From'] = 'alerts@example.com'
+    msg['To'] = to
+    msg['Subject'] = 'Price Drop Alert!'
+    return msg
+
+
+def make_mailer(controller, **options):
+    return Mailer(controller.hostname, controller.port, use_tls=False,
+                  rate_per_sec=0, backoff=0, timeout=5, **options)
+
+
+def test_send_many_delivers_every_message(smtp_server):
+    handler = RecordingHandler()
+    mailer = make_mailer(smtp_server(handler), workers=3)
+    recipients = [f"user{i}@example.com" for i in range(10)]
+
+    assert mailer.send_many([message(to) for to in recipients]) == (10, 0)
+    assert sorted(to for to, _ in handler.delivered) == sorted(recipients)
+    assert all(f"Hello {to}" in body for to, body in handler.delivered)
+
+
+def test_send_many_retries_temporary_failures(smtp_server):
+    handler = RecordingHandler(fail_first=2)
+    mailer = make_mailer(smtp_server(handler), workers=1, max_retries=3)
+
+    assert mailer.send_many([message('user@example.com')]) == (1, 0)
+    assert [to for to, _ in handler.delivered] == ['user@example.com']
+
+
+def test_send_many_gives_up_after_max_retries(smtp_server):
+    handler = RecordingHandler(fail_first=10)
+    mailer = make_mailer(smtp_server(handler), workers=1, max_retries=2)
+
+    assert mailer.send_many([message('user@example.com')]) == (0, 1)
+    assert handler.fail_first == 7  # One attempt plus two retries
+
+
+def test_refused_recipient_is_not_retried(smtp_server):
+    handler = RecordingHandler(refuse={'gone@example.com'})
+    mailer = make_mailer(smtp_server(handler), workers=1, max_retries=3)
+
+    sent, failed = mailer.send_many([message('gone@example.com'), message('user@example.com')])
+
+    assert (sent, failed) == (1, 1)
+    assert handler.rcpt_attempts.count('gone@example.com') == 1
+    assert [to for to, _ in handler.delivered] == ['user@example.com']
+
+
+def test_send_many_with_no_messages():
+    mailer = Mailer('127.0.0.1', free_port(), use_tls=False)
+    assert mailer.send_many([]) == (0, 0)
@@ -0,0 +1,83 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import training
+from model_registry import ModelRegistry
+from predictor import FEATURES, TARGET, PricePredictionModel
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path), reload_interval=0, keep=2)
+
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    dataset = pd.DataFrame(rng.random((20, len(FEATURES))), columns=FEATURES)
+    dataset[TARGET] = dataset['price_change'] * 100
+    model = PricePredictionModel(dataset)
+    model.train_model()
+    return model
+
+
+def features():
+    return pd.DataFrame([[0.5] * len(FEATURES)], columns=FEATURES, index=[1])
+
+
+def test_publish_keeps_the_active_version_during_a_split(registry, model):
+    registry.publish(model, 'd1', activate=True)
+    registry.publish(model, 'd2')
+    registry.split('v2', 0.5)
+
+    registry.publish(model, 'd3', activate=True)
+
+    manifest = registry.manifest()
+    assert (manifest['active'], manifest['candidate'], manifest['split']) == ('v1', 'v2', 0.5)
+
+
+def test_publish_prunes_old_versions_and_their_cache(registry, model):
+    registry.publish(model, 'd1', activate=True)
+    registry.predict_many(features())
+    assert 'v1' in registry._models
+
+    for data in ('d2', 'd3', 'd4'):
+        version = registry.publish(model, data, activate=True)
+    registry.predict_many(features())
+
+    manifest = registry.manifest()
+    assert version == 'v4'
+    assert sorted(manifest['versions']) == ['v3', 'v4']
+    assert not os.path.exists(registry.artifact_path('v1'))
+    assert sorted(registry._models) == ['v4']
+    assert registry.publish(model, 'd5') == 'v5'
+
+
+def test_pruning_never_removes_the_active_or_candidate_version(registry, model):
+    registry.publish(model, 'd1', activate=True)
+    registry.publish(model, 'd2')
+    registry.split('v2', 0.1)
+    for data in ('d3', 'd4', 'd5'):
+        registry.publish(model, data)
+
+    assert sorted(registry.manifest()['versions']) == ['v1', 'v2', 'v4', 'v5']
+
+
+@pytest.mark.parametrize('age, observations, retrains', [
+    (timedelta(hours=1), 1050, False),
+    (timedelta(hours=1), 1100, True),
+    (timedelta(days=1), 1001, True),
+])
+def test_retraining_is_throttled(registry, model, monkeypatch, age, observations, retrains):
+    registry.publish(model, 'amazon:1000:1000:5000')
+    trained_at = datetime.fromisoformat(registry.latest()['trained_at'])
+    monkeypatch.setattr(training, 'data_version', lambda platform: f"amazon:{observations}:{observations}:5000")
+    monkeypatch.setattr(training, 'train', lambda registry, platform, activate: 'v2')
+
+    version = training.retrain_if_changed(registry, now=trained_at + age)
+
+    assert (version == 'v2') == retrains
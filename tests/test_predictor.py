@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictor import PricePredictionModel, clean_prices
+
+
+def history(prices_by_day):
+    frame = pd.DataFrame({'srno': [1, 2, 3], 'name': ['A', 'B', 'C'], 'link': ['a', 'b', 'c']})
+    for day, prices in prices_by_day.items():
+        frame[day] = prices
+    return frame
+
+
+def test_clean_prices_parses_scraped_text():
+    prices = pd.DataFrame({
+        '2024-12-30': ['₹1,299', 'N/A', None],
+        '2025-01-02': ['Rs. 1,199.50', '', 'out of stock'],
+        '2025-01-03': [1099.0, 0, -5],
+    })
+    cleaned = clean_prices(prices)
+
+    assert cleaned.loc[0].tolist() == [1299.0, 1199.5, 1099.0]
+    assert cleaned.loc[1:].isna().all().all()
+
+
+
+def test_clean_prices_ignores_whitespace_in_scraped_text():
+    prices = pd.DataFrame({
+        '2025-01-01': ['₹1,299 ', ' ₹1,299\t', '1,299.50\n'],
+        '2025-01-02': ['₹\n1,299', 'Rs.\xa01,299', '\n ₹ 1,299.50 \n'],
+    })
+    cleaned = clean_prices(prices)
+
+    assert cleaned.to_numpy().tolist() == [[1299.0, 1299.0], [1299.0, 1299.0], [1299.5, 1299.5]]
+
+def test_preprocess_data_uses_every_year_of_history():
+    model = PricePredictionModel(history({
+        '2024-12-30': ['₹1,000', '₹500', '₹800'],
+        '2025-01-02': ['₹800', None, '₹800'],
+        '2025-01-03': ['₹1,000', None, '₹800'],
+    }))
+    dataset = model.preprocess_data()
+
+    # Product 2 has a single price and is dropped
+    assert dataset['srno'].tolist() == [1, 3]
+    assert dataset['avg_price'].tolist() == pytest.approx([2800 / 3, 800])
+    assert dataset['price_std'].tolist() == pytest.approx([np.std([1000, 800, 1000], ddof=1), 0])
+    assert dataset['price_change'].tolist() == pytest.approx([0.2, 0])
+    assert dataset['price_drop_prob'].tolist() == pytest.approx([20, 0])
+
+
+def test_text_and_numeric_history_give_the_same_features():
+    days = {'2025-01-01': [1000.0, 2000.0, np.nan], '2025-01-02': [900.0, 2000.0, 500.0], '2025-01-03': [950.0, 1500.0, 450.0]}
+    as_text = {day: [f"₹{p:,.0f}" if p == p else 'N/A' for p in prices] for day, prices in days.items()}
+
+    numeric = PricePredictionModel(history(days)).preprocess_data()
+    text = PricePredictionModel(history(as_text)).preprocess_data()
+
+    for feature in ('avg_price', 'price_std', 'price_change', 'price_drop_prob'):
+        assert text[feature].tolist() == pytest.approx(numeric[feature].tolist())
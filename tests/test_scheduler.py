@@ -0,0 +1,52 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import functions
+import scheduler
+
+
+@pytest.fixture
+def price_db(tmp_path, monkeypatch):
+    path = tmp_path / 'prices.db'
+
+    def connect():
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    conn = connect()
+    functions.init_price_store(conn)
+    monkeypatch.setattr(scheduler, 'get_price_history_db_connection', connect)
+    monkeypatch.setattr(scheduler, 'watcher_counts', lambda: {})
+    yield conn
+    conn.close()
+
+
+def due_srnos(now):
+    due, _ = scheduler.plan(budget=100, now=now)
+    return {srno for platform, srno, _ in due if platform == 'amazon'}
+
+
+def test_failed_refresh_waits_out_its_tier_interval(price_db):
+    now = datetime(2025, 3, 1, 12, 0)
+    dead = functions.add_product(price_db, 'amazon', 'Dead link', 'https://www.amazon.in/dp/dead')
+    new = functions.add_product(price_db, 'amazon', 'Never tried', 'https://www.amazon.in/dp/new')
+    functions.record_failed_scrapes(price_db, 'amazon', [dead], (now - timedelta(minutes=10)).isoformat())
+    price_db.commit()
+
+    assert due_srnos(now) == {new}
+    assert dead in due_srnos(now + timedelta(days=1))
+
+
+def test_failed_attempts_are_not_prices(price_db):
+    srno = functions.add_product(price_db, 'amazon', 'Echo Dot', 'https://www.amazon.in/dp/1')
+    functions.record_prices(price_db, 'amazon', [(srno, '₹4,499')], '2025-03-01T10:00:00')
+    functions.record_failed_scrapes(price_db, 'amazon', [srno], '2025-03-01T11:00:00')
+    price_db.commit()
+
+    statuses = [row[0] for row in price_db.execute("SELECT status FROM price_observation ORDER BY observed_at")]
+    assert statuses == [functions.PRICE_OK, functions.PRICE_FAILED]
+    assert price_db.execute("SELECT n FROM price_feature").fetchone()[0] == 1
+    assert list(functions.load_price_matrix('amazon', conn=price_db).iloc[0]) == [449900]
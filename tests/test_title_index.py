@@ -0,0 +1,52 @@
+import pytest
+
+from title_index import TitleIndex, normalize_title
+from functions import TITLE_MATCH_THRESHOLD, title_similarity
+
+
+CATALOGUE = [
+    (1, "Apple iPhone 15 (128 GB) - Black"),
+    (2, "Apple iPhone 15 Pro (128 GB) - Natural Titanium"),
+    (3, "Samsung Galaxy S24 5G (Onyx Black, 8GB, 256GB)"),
+    (4, "boAt Rockerz 450 Bluetooth On Ear Headphones with Mic"),
+]
+
+
+def test_normalize_title_joins_units():
+    assert normalize_title("Apple iPhone 15 (256 GB)") == ['apple', 'iphone', '15', '256gb']
+
+
+@pytest.mark.parametrize('title, other', [
+    ("Apple iPhone 15 Pro Max (256 GB)", "APPLE iPhone 15"),
+    ("iPhone 15 Pro Max", "iPhone 15 Pro"),
+    ("Samsung Galaxy S24 Ultra", "Samsung Galaxy S24 5G"),
+    ("iPhone 15 Pro 256GB", "iPhone 15 128GB"),
+    ("iPhone 15 256GB", "iPhone 15 128GB"),
+])
+def test_near_miss_variants_stay_below_threshold(title, other):
+    assert title_similarity(title, other) < TITLE_MATCH_THRESHOLD
+    assert title_similarity(other, title) < TITLE_MATCH_THRESHOLD
+
+
+@pytest.mark.parametrize('title, other', [
+    ("Apple iPhone 15 (128 GB) - Black", "APPLE iPhone 15 (Black, 128 GB)"),
+    ("Samsung Galaxy S24 Ultra 5G (Titanium Gray, 12GB, 256GB)",
+     "SAMSUNG Galaxy S24 Ultra 5G (Titanium Gray, 256 GB) (12 GB RAM)"),
+])
+def test_same_product_matches(title, other):
+    assert title_similarity(title, other) >= TITLE_MATCH_THRESHOLD
+
+
+def test_words_missing_from_the_index_lower_the_score():
+    index = TitleIndex(CATALOGUE)
+    exact = index.lookup("Apple iPhone 15 (128 GB) - Black")
+    padded = index.lookup("Apple iPhone 15 (128 GB) - Black Refurbished Renewed")
+    assert exact[0][0] == padded[0][0] == 1
+    assert padded[0][2] < exact[0][2]
+
+
+def test_lookup_skips_other_variants_in_the_index():
+    index = TitleIndex(CATALOGUE)
+    assert index.lookup("Apple iPhone 15 Pro Max (256 GB)") == []
+    assert index.lookup("Samsung Galaxy S24 Ultra") == []
+    assert index.lookup("Apple iPhone 15 Pro (128 GB) - Blue")[0][0] == 2
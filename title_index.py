@@ -0,0 +1,125 @@
+# title_index.py
+
+import re
+import threading
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Words that describe the listing rather than the product
+STOPWORDS = {'with', 'and', 'for', 'the', 'of', 'in', 'new', 'latest', 'edition', 'version', 'pack', 'combo'}
+UNITS = r'(gb|tb|mb|mah|w|inch|in|cm|mm|hz|mp|l|kg|g)'
+# Words that name a different model of the same line ("iPhone 15 Pro" vs "iPhone 15 Pro Max")
+VARIANT_WORDS = {'pro', 'max', 'ultra', 'plus', 'mini', 'lite'}
+
+
+def normalize_title(title):
+    """Lowercase, join numbers to their units ("128 GB" -> "128gb") and split into tokens."""
+    text = (title or '').lower().replace('"', ' inch ')
+    text = re.sub(r'(\d+(?:\.\d+)?)\s*' + UNITS + r'\b', r'\1\2', text)
+    return [token for token in re.findall(r'[a-z0-9][a-z0-9.+-]*[a-z0-9+]|[a-z0-9]', text)
+            if token not in STOPWORDS]
+
+
+def brand_and_model(tokens):
+    """
+    First token is taken as the brand; tokens containing digits and variant
+    words (VARIANT_WORDS) identify the model.
+    """
+    brand = tokens[0] if tokens else None
+    model = {token for token in tokens if token in VARIANT_WORDS or any(ch.isdigit() for ch in token)}
+    return brand, model
+
+
+def model_agreement(model, other_model):
+    """
+    0..1 factor for how well two titles' model tokens agree: 0 when a
+    variant word is on one side only, else their Jaccard overlap (1 when
+    either title has no model tokens).
+    """
+    if (model ^ other_model) & VARIANT_WORDS:
+        return 0.0
+    if not model or not other_model:
+        return 1.0
+    return len(model & other_model) / len(model | other_model)
+
+
+class TitleIndex:
+    """
+    In-memory TF-IDF index over product titles. lookup() shortlists indexed
+    titles with a single sparse matrix product, then rescores each one by
+    IDF-weighted overlap of both titles' tokens (words the index has never
+    seen count too), requires the same brand and penalises disagreeing
+    model tokens.
+    """
+
+    def __init__(self, rows):
+        # rows: iterable of (key, title)
+        rows = [(key, title) for key, title in rows if title]
+        self.keys = [key for key, _ in rows]
+        self.titles = [title for _, title in rows]
+        self._tokens = [normalize_title(title) for title in self.titles]
+        self._brand_model = [brand_and_model(tokens) for tokens in self._tokens]
+        self._vectorizer = None
+        self._matrix = None
+        self._idf = {}
+        self._unseen_idf = 1.0
+        if self.keys:
+            self._vectorizer = TfidfVectorizer(analyzer=lambda tokens: tokens, sublinear_tf=True)
+            self._matrix = self._vectorizer.fit_transform(self._tokens)
+            self._idf = dict(zip(self._vectorizer.get_feature_names_out(), self._vectorizer.idf_))
+            self._unseen_idf = float(self._vectorizer.idf_.max())  # As rare as the rarest indexed word
+
+    def _overlap(self, tokens, other_tokens):
+        """IDF-weighted cosine between two token sets; extra words on either side lower it."""
+        tokens, other_tokens = set(tokens), set(other_tokens)
+        weight = lambda token: self._idf.get(token, self._unseen_idf) ** 2
+        shared = sum(weight(token) for token in tokens & other_tokens)
+        if not shared:
+            return 0.0
+        return shared / np.sqrt(sum(map(weight, tokens)) * sum(map(weight, other_tokens)))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, title, limit=1):
+        """Return up to `limit` (key, title, score) tuples, best first."""
+        if self._matrix is None:
+            return []
+        tokens = normalize_title(title)
+        brand, model = brand_and_model(tokens)
+        scores = (self._matrix @ self._vectorizer.transform([tokens]).T).toarray().ravel()
+
+        results = []
+        for i in np.argsort(-scores)[:max(limit * 5, 10)]:
+            if scores[i] <= 0:
+                break
+            other_brand, other_model = self._brand_model[i]
+            if brand != other_brand:
+                continue
+            # "iphone 15 128gb" vs "iphone 15 256gb" share words but are different products
+            score = self._overlap(tokens, self._tokens[i]) * model_agreement(model, other_model)
+            if score > 0:
+                results.append((self.keys[i], self.titles[i], round(float(score), 3)))
+        results.sort(key=lambda result: -result[2])
+        return results[:limit]
+
+
+class IndexCache:
+    """Keeps one TitleIndex per name and rebuilds it when its source's version changes."""
+
+    def __init__(self, load):
+        self._load = load  # load(name) -> (version, rows)
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, version):
+        with self._lock:
+            cached = self._indexes.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+        version, rows = self._load(name)
+        index = TitleIndex(rows)
+        with self._lock:
+            self._indexes[name] = (version, index)
+        return index
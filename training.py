@@ -0,0 +1,137 @@
+# training.py
+#
+# Offline training for the price-drop model: `python training.py [--force]`.
+# Each trained model is published to the model registry as a new version with
+# a fingerprint of its training data. Without --force, training is skipped
+# while that fingerprint is unchanged, and runs at most once a day unless the
+# price history has grown by RETRAIN_MIN_GROWTH. The web app only loads
+# published artifacts.
+# Features come straight from the price_feature store, so neither training
+# nor scoring reads the raw price history. Every run then scores all tracked
+# products in one batch (price_prediction).
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from functions import PLATFORM_TABLES, get_price_history_db_connection, load_price_features
+from model_registry import ModelRegistry
+from predictor import TARGET, PricePredictionModel, price_drop_target
+
+TRAINING_PLATFORM = 'amazon'
+RETRAIN_INTERVAL = timedelta(days=1)
+RETRAIN_MIN_GROWTH = 0.1  # Share of new observations that retrains before RETRAIN_INTERVAL is up
+
+
+def data_version(platform=TRAINING_PLATFORM):
+    """
+    Cheap fingerprint of the training data: observations are append-only
+    (INSERT OR REPLACE bumps the rowid), so count, max rowid and price total
+    change whenever the data does.
+    """
+    conn = get_price_history_db_connection()
+    try:
+        count, max_rowid, total = conn.execute(
+            "SELECT COUNT(*), MAX(rowid), TOTAL(price_paise) FROM price_observation WHERE platform = ?",
+            (platform,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return f"{platform}:{count}:{max_rowid or 0}:{int(total)}"
+
+
+def train(registry=None, platform=TRAINING_PLATFORM, activate=True):
+    """
+    Train on the current price history and publish it. With activate=False
+    the new version is only registered, ready for an A/B split.
+    """
+    registry = registry or ModelRegistry()
+    version = data_version(platform)
+    dataset = load_price_features(platform)
+    dataset[TARGET] = price_drop_target(dataset['price_change'])
+    model = PricePredictionModel(dataset)
+    model.train_model()
+    return registry.publish(model, version, activate=activate)
+
+
+def _observation_count(version):
+    try:
+        return int(version.split(':')[1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def retrain_if_changed(registry=None, platform=TRAINING_PLATFORM, activate=True, now=None):
+    """
+    Retrain when the data changed since the newest published version and that
+    version is older than RETRAIN_INTERVAL, or the observations grew by
+    RETRAIN_MIN_GROWTH since. Returns the new version or None.
+    """
+    registry = registry or ModelRegistry()
+    current = data_version(platform)
+    latest = registry.latest()
+    if latest is not None:
+        if current == latest['data_version']:
+            logging.info("Price data unchanged since the last training; skipping.")
+            return None
+        age = (now or datetime.now()) - datetime.fromisoformat(latest['trained_at'])
+        trained_on = _observation_count(latest['data_version'])
+        growth = _observation_count(current) / trained_on - 1 if trained_on else float('inf')
+        if age < RETRAIN_INTERVAL and growth < RETRAIN_MIN_GROWTH:
+            logging.info(f"Last model is {age} old and the data grew {growth:.1%}; skipping.")
+            return None
+    return train(registry, platform, activate)
+
+
+def precompute_predictions(registry=None, platforms=None):
+    """
+    Score every tracked product in one batch per platform and store the
+    results in price_prediction for the dashboard. Returns rows written.
+    """
+    registry = registry or ModelRegistry()
+    predicted_at = datetime.now().isoformat(timespec='seconds')
+    written = 0
+    conn = get_price_history_db_connection()
+    try:
+        for platform in platforms or PLATFORM_TABLES:
+            started = time.perf_counter()
+            features = load_price_features(platform, conn=conn)
+            if features.empty:
+                continue
+            predictions, versions = registry.predict_many(features)
+            scored = predictions.notna()
+            rows = [(platform, int(product_id), int(predictions[product_id]), versions[product_id], predicted_at)
+                    for product_id in predictions.index[scored]]
+            conn.execute("DELETE FROM price_prediction WHERE platform = ?", (platform,))
+            conn.executemany(
+                "INSERT INTO price_prediction (platform, product_id, drop_probability, model_version, predicted_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+            written += len(rows)
+            logging.info(f"Scored {len(rows)} {platform} products in {time.perf_counter() - started:.2f}s.")
+    finally:
+        conn.close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the price-drop model and save it for the web app.")
+    parser.add_argument('--force', action='store_true', help="retrain even if the data is unchanged or the model is recent")
+    parser.add_argument('--no-activate', dest='activate', action='store_false',
+                        help="register the new version without serving it (see model_registry.py split)")
+    args = parser.parse_args(argv)
+
+    if args.force:
+        version = train(activate=args.activate)
+    else:
+        version = retrain_if_changed(activate=args.activate)
+    if version:
+        print(f"Published {version}")
+    print(f"Precomputed {precompute_predictions()} drop probabilities")
+
+
+if __name__ == '__main__':
+    main()